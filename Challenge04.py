@@ -1,20 +1,13 @@
 import cryptopalsmod.xorattacks as xorattacks
-import cryptopalsmod.bytestringops as bso
+from cryptopalsmod import fileops
 
 def main(): 
 
 
-    #Load in the cipher texts from the file
-    ciphertexts = []
-    with open('4.txt') as file:
-        for line in file:
-            ciphertexts.append(bso.hex_to_bytes(line))
+    #Stream the cipher texts from the file and keep only the best result
+    ciphertexts = fileops.iter_records('4.txt', 'hex')
 
-    results = []
-    for ciphertext in ciphertexts:
-        results.append(next(xorattacks.xor_singlebyte_key_attack(ciphertext)))
-
-    results = sorted(results, key=lambda val: val['score'], reverse=True)
+    results = xorattacks.detect_single_byte_xor(ciphertexts, top_k=1)
     
     assert results[0]['decryption'] == b'Now that the party is jumping\n'
         
@@ -22,4 +15,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
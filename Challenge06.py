@@ -1,13 +1,10 @@
 import cryptopalsmod.bytestringops as bso 
 import cryptopalsmod.xorattacks as xorattacks
-import base64
+from cryptopalsmod import fileops
 import S1C6
 
 def loadChallengeFile(): 
-    with open('6.txt') as file:
-        b64 = file.read()
-    
-    return base64.b64decode(b64)
+    return bytes(fileops.load_decoded('6.txt', 'base64'))
 
 def main():
     
@@ -15,7 +12,7 @@ def main():
 
     ciphertext = loadChallengeFile()
 
-    possible_decryptions = xorattacks.repeatedXOR_attack(ciphertext)
+    possible_decryptions = xorattacks.repeatedXOR_attack(ciphertext, k=1)
     key_plaintext = next(possible_decryptions)
     
     assert key_plaintext['key'] == b'Terminator X: Bring the noise'
@@ -1,5 +1,5 @@
 import cryptopalsmod.ciphers.aes_ecb
-import base64
+from cryptopalsmod import fileops
 
 def main():
     
@@ -7,10 +7,7 @@ def main():
     
     cipher = cryptopalsmod.ciphers.aes_ecb.AES_ECB(key)
 
-    with open('7.txt') as file:
-        ciphertext64 = file.read()
-
-    ciphertext = base64.b64decode(ciphertext64)
+    ciphertext = bytes(fileops.load_decoded('7.txt', 'base64'))
 
     assert cipher.decrypt(ciphertext)[:33] == b"I'm back and I'm ringin' the bell"
 
@@ -1,14 +1,9 @@
 import cryptopalsmod.aes_ecb_attacks as ecb_attacks 
+from cryptopalsmod import fileops
 
 def load_challenge_file():
     
-    ciphertextList = []
-    
-    with open('8.txt') as file:
-        for line in file:
-            ciphertextList.append(bytes.fromhex(line))
-    
-    return ciphertextList
+    return fileops.iter_records('8.txt', 'hex')
 
 def main():
     ciphertextList = load_challenge_file()
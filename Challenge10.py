@@ -1,10 +1,8 @@
 from cryptopalsmod.ciphers.aes_cbc import AES_CBC
-import base64
+from cryptopalsmod import fileops
 
 def loadChallengeData():
-    with open('10.txt') as file:
-        ciphertext = file.read()
-    return base64.b64decode(ciphertext)
+    return fileops.load_decoded('10.txt', 'base64')
 
     
 
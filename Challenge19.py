@@ -0,0 +1,46 @@
+from cryptopalsmod import fileops
+from cryptopalsmod.ciphers.aes_ctr import AES_CTR_random
+from cryptopalsmod.cribdrag import CribDragger
+import cryptopalsmod.bytestringops as bso
+
+
+def recover_keystream(dragger, length):
+    """Builds the keystream from the best dictionary words first, skipping
+    words which disagree with the keystream found so far"""
+    keystream = bytearray(length)
+    known = bytearray(length)
+
+    for result in dragger.drag_dictionary():
+        offset = result['offset']
+        key, _ = dragger.reveal(result['index'], offset, result['crib'])
+        if any(known[offset + i] and keystream[offset + i] != byte for i, byte in enumerate(key)):
+            continue
+        keystream[offset: offset + len(key)] = key
+        known[offset: offset + len(key)] = b'\x01'*len(key)
+
+    return bytes(keystream)
+
+
+def main():
+
+    plaintexts = list(fileops.iter_records('19.txt', 'base64'))
+
+    #Every line is encrypted with the same nonce, so the same keystream
+    cipher = AES_CTR_random()
+    ciphertexts = [cipher.encrypt_decrypt(plaintext, 0) for plaintext in plaintexts]
+
+    dragger = CribDragger(ciphertexts)
+    keystream = recover_keystream(dragger, max(len(ciphertext) for ciphertext in ciphertexts))
+
+    #Where every plaintext has a letter, the case can't be told from the
+    #ciphertexts, and the end of the longest lines has too little to go on
+    correct = 0
+    for ciphertext, plaintext in zip(ciphertexts, plaintexts):
+        decryption = bso.zipXOR(keystream, ciphertext)
+        print(decryption)
+        correct += sum(a == b for a, b in zip(decryption.lower(), plaintext.lower()))
+
+    assert correct >= 0.95*sum(len(plaintext) for plaintext in plaintexts)
+
+if __name__ == "__main__":
+    main()
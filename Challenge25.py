@@ -1,12 +1,11 @@
 from cryptopalsmod.ciphers.aes_ctr import AES_CTR_random
 import cryptopalsmod.aes_ctr_attacks as ctr_attacks
-import base64
+from cryptopalsmod import fileops
 from cryptopalsmod.ciphers.aes_ecb import AES_ECB
 
 def load_challenge_text():
     
-    with open('25.txt') as file:
-        ecb_ciphertext = base64.b64decode(file.read())
+    ecb_ciphertext = bytes(fileops.load_decoded('25.txt', 'base64'))
 
     cipher = AES_ECB(b'YELLOW SUBMARINE')
     return cipher.decrypt(ecb_ciphertext)
@@ -1,8 +1,9 @@
 from cryptopalsmod.srp import srpclient
-import requests
 
 
 def main():
+    import requests
+
     user_data = (b'foo@bar.com', b'passwordabc')
 
     client = srpclient.SRPClient_HTTP(user_data)
@@ -1,9 +1,9 @@
-import requests
 from hashlib import sha256
 from cryptopalsmod.hmac import hmac
 import cryptopalsmod.bytestringops as bso
 
 def main():
+    import requests
     
     
     # Server sends base, prime and k
@@ -3,8 +3,7 @@ is susceptable to a dictionary attack. To run, first run Challenge38_server.py
 """
 
 from cryptopalsmod.srp import simplified_srpclient, simplified_srpserver
-import requests
-from cryptopalsmod.number_theory import NIST_PRIME, modexp
+from cryptopalsmod.number_theory import NIST_PRIME, fixed_base, modexp
 from cryptopalsmod import bytestringops as bso
 from hashlib import sha256
 import json
@@ -76,8 +75,8 @@ def test_hmac(password, salt, u, client_public_key, secret_key, base, real_hmac,
             bool: True if simple srp claculation matches hmac given, false otherwise
         """
         salt = bso.int_to_bytes(salt)
-        x = int(sha256(salt + password).hexdigest(), 16)
-        v = modexp(base, x, prime)
+        x = bso.bytes_to_int(sha256(salt + password).digest())
+        v = fixed_base(base, prime).pow_fixed(x)
 
         S = modexp(client_public_key * modexp(v, u, prime), secret_key, prime)
         
@@ -104,6 +103,8 @@ def test_server(user_data, address):
         requests with status code 200 if the verification was succesful, 400 
             otherwise
     """ 
+    import requests
+
     client = simplified_srpclient.SimplifiedSRPClient_HTTP(user_data)
 
     # Server sends base, prime and k
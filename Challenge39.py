@@ -13,11 +13,10 @@ def main():
     assert alice.decrypt(ciphertext) == bob_msg
 
     plaintext = b'A random message'
-    plaintext_int = int(bso.bytes_to_hex(plaintext), 16)
+    plaintext_int = bso.bytes_to_int(plaintext)
     decrypted_message = alice.decrypt(bob.encrypt(plaintext_int))
-    decrypted_message = hex(decrypted_message)
 
-    decrypted_message = bso.hex_to_bytes(decrypted_message[2:])
+    decrypted_message = bso.int_to_bytes(decrypted_message)
     assert decrypted_message == plaintext
 if __name__ == '__main__':
     main()
\ No newline at end of file
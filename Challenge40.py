@@ -4,7 +4,7 @@ from cryptopalsmod import rsa_attacks
 
 def main():
     message = b'A test message'
-    message_int = int(bso.bytes_to_hex(message), 16)
+    message_int = bso.bytes_to_int(message)
 
     ciphertexts = []
     public_keys = []
@@ -25,7 +25,7 @@ def main():
     #Now decrypt without using the secret key
     
     discovered_message_int = rsa_attacks.hastad_attack(3, ciphertexts, public_keys)
-    discovered_message = bso.hex_to_bytes(hex(discovered_message_int)[2:])
+    discovered_message = bso.int_to_bytes(discovered_message_int)
     
     assert discovered_message == message
 
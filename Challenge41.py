@@ -31,18 +31,18 @@ def main():
     message = b'A secret message'
 
     #Client encrypts the message
-    message_int = int(bso.bytes_to_hex(message), 16)
+    message_int = bso.bytes_to_int(message)
     ciphertext = client.encrypt(message_int)
 
     #Client sends ciphertext which gets decrypted
 
-    assert message == bso.hex_to_bytes(hex(oracle.decrypt(ciphertext))[2:])
+    assert message == bso.int_to_bytes(oracle.decrypt(ciphertext))
 
     #Attacker intercepts the ciphertext and tries to get the plaintext from 
     #the oracle. This fails because the oracle only decrypts each plaintext once
 
     try:
-        successfully_decrypted = message == bso.hex_to_bytes(hex(oracle.decrypt(ciphertext))[2:])
+        successfully_decrypted = message == bso.int_to_bytes(oracle.decrypt(ciphertext))
     except:
         successfully_decrypted = False
 
@@ -65,7 +65,7 @@ def main():
     #altered message = S * message
 
     new_message = altered_message * nt.invmod(S, n) % n
-    assert message == bso.hex_to_bytes(hex(new_message)[2:])
+    assert message == bso.int_to_bytes(new_message)
 
 
     
@@ -1,5 +1,4 @@
 from cryptopalsmod.hash.sha1 import SHA1
-import itertools
 from cryptopalsmod.dsa_attacks import DSAattacks
 
 def laod_chalenge_data():
@@ -25,14 +24,8 @@ def laod_chalenge_data():
 def main():
     sig_dicts = laod_chalenge_data()
 
-    #create an iterator of signature pairs 
-    sig_pairs = itertools.combinations(sig_dicts, 2)
-
     attacker = DSAattacks(SHA1)
-    for pair in sig_pairs:
-        secret_key = attacker.key_from_double_signing(*pair)
-        if secret_key > 0:
-            break
+    secret_key = attacker.key_from_repeated_nonce(sig_dicts)
 
     assert SHA1(hex(secret_key)[2:].encode()).hexdigest() == 'ca8f6f7c66fa362d40760d135b763eb8527d3d52'
     
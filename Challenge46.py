@@ -20,7 +20,7 @@ def main():
     plaintext = 'VGhhdCdzIHdoeSBJIGZvdW5kIHlvdSBkb24ndCBwbGF5IGFyb3VuZCB3aXRoIHRoZSBGdW5reSBDb2xkIE1lZGluYQ=='
     plaintext = base64.b64decode(plaintext)
 
-    integer_plaintext = int(bso.bytes_to_hex(plaintext), 16)
+    integer_plaintext = bso.bytes_to_int(plaintext)
     ciphertext = client.encrypt(integer_plaintext)
 
     cracked_plaintext = rsa_attacks.parity_oracle_attack(ciphertext,
@@ -28,7 +28,7 @@ def main():
                                                         mod, 
                                                         lambda val: server.is_even(val))
                                                         
-    assert bso.hex_to_bytes(hex(cracked_plaintext)[2:]) == b"That's why I found you don't play around with the Funky Cold Medind"
+    assert bso.int_to_bytes(cracked_plaintext) == b"That's why I found you don't play around with the Funky Cold Medind"
 
 if __name__ == "__main__":
     main()
@@ -11,7 +11,7 @@ class RSAPaddingOracle(rsa.RSAServer):
         #Decrypt a la RSA
         plaintext = nt.modexp(ciphertext, self.d, self.n)
 
-        plaintext = plaintext.to_bytes(bso.byte_len(self.n), 'big')
+        plaintext = bso.int_to_bytes(plaintext, bso.byte_len(self.n))
 
         #Check the padding before returning the decryption
         if self.check_padding_from_bytes(plaintext):
@@ -38,7 +38,7 @@ class ChallengeRSAClient(rsa.RSAClient):
 
     def pad_and_encrypt(self, plaintext):
         plaintext = self.pad(plaintext)
-        plaintext = int(bso.bytes_to_hex(plaintext), 16)
+        plaintext = bso.bytes_to_int(plaintext)
         return self.encrypt(plaintext)
 
     def pad(self, plaintext):
@@ -0,0 +1,4 @@
+"""Benchmarks for cryptopalsmod. Run each module from the repository root, eg
+
+    python -m benchmarks.import_budget
+"""
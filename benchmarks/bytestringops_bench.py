@@ -0,0 +1,222 @@
+"""Times the functions in cryptopalsmod.bytestringops across input sizes and
+compares the results against a stored baseline. A function is reported as a
+regression if it is slower than the baseline by more than a threshold (and by
+more than timing noise) at any size, which catches accidental quadratic
+behaviour before it ships.
+
+Usage:
+    python -m benchmarks.bytestringops_bench --save-baseline
+    python -m benchmarks.bytestringops_bench [--threshold 0.25] [--output results.json]
+
+Exits with status 1 if any function regressed, or if there is no baseline to
+compare against.
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import timeit
+
+import cryptopalsmod.bytestringops as bso
+
+#Input sizes in bytes, 16 B to 64 MB in powers of 4
+SIZES = [16*4**i for i in range(0, 12)]
+
+#Some functions are inherently superlinear or limited in input size. They are
+#only timed up to these sizes.
+MAX_SIZES = {
+    'pairwise_hamming': 2**14,
+    'pad_pkcs7': 2**20,
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline_bytestringops.json')
+
+#Smallest total time (s) spent on each measurement, so fast calls are repeated
+MIN_TIME = 0.02
+
+#Slow downs (s per call) smaller than this are not reported, however large
+#they are relative to the baseline. Calls on small inputs take a few
+#microseconds and can vary by half of that between runs, while the quadratic
+#behaviour this looks for costs milliseconds at the larger sizes.
+MIN_DELTA = 1e-4
+
+def _cases(size):
+    """Returns a dict of name -> function of no arguments which builds inputs
+    of length size and returns a function of no arguments which calls the
+    bytestringops function of that name on them. Inputs are only built for
+    the functions which are timed, and only one function's inputs are alive
+    at a time."""
+    data = lambda: os.urandom(size)
+    key = os.urandom(29)
+
+    def blocks():
+        data = os.urandom(size - size % 16)
+        return [data[i:i + 16] for i in range(0, len(data), 16)]
+
+    def padder(data):
+        padder = bso.Padder(16, extra_block=True)
+        for start in range(0, size, 4096):
+            padder.update(data[start:start + 4096])
+        padder.finalize()
+
+    def unpadder(padded):
+        unpadder = bso.Unpadder(16)
+        for start in range(0, len(padded), 4096):
+            unpadder.update(padded[start:start + 4096])
+        unpadder.finalize()
+
+    padded = lambda: bso.pad_by_multiple(data(), 16, extra_block=True)
+
+    return {
+        'hex_to_bytes': lambda: functools.partial(bso.hex_to_bytes, bso.bytes_to_hex(data())),
+        'bytes_to_hex': lambda: functools.partial(bso.bytes_to_hex, data()),
+        'bytes_to_64': lambda: functools.partial(bso.bytes_to_64, data()),
+        'hex_to_64': lambda: functools.partial(bso.hex_to_64, bso.bytes_to_hex(data())),
+        'FixedXOR': lambda: functools.partial(bso.FixedXOR, data(), data()),
+        'repeatedXOR': lambda: functools.partial(bso.repeatedXOR, data(), key),
+        'zipXOR': lambda: functools.partial(bso.zipXOR, data(), data()),
+        'xor_into': lambda: functools.partial(bso.xor_into, bytearray(data()), data()),
+        'repeated_xor_into': lambda: functools.partial(bso.repeated_xor_into, bytearray(data()), key),
+        'HammingDistance': lambda: functools.partial(bso.HammingDistance, data(), data()),
+        'pairwise_hamming': lambda: functools.partial(bso.pairwise_hamming, blocks()),
+        'transpose_by_blocklength': lambda: functools.partial(bso.transpose_by_blocklength, data(), 29),
+        'BlockView': lambda: functools.partial(lambda data: sum(1 for _ in bso.BlockView(data, 16)), data()),
+        'pad_pkcs7': lambda: functools.partial(bso.pad_pkcs7, data(), size + 16),
+        'pad_by_multiple': lambda: functools.partial(bso.pad_by_multiple, data(), 16, extra_block=True),
+        'remove_padding_pkcs7': lambda: functools.partial(bso.remove_padding_pkcs7, padded()),
+        'Padder': lambda: functools.partial(padder, data()),
+        'Unpadder': lambda: functools.partial(unpadder, padded()),
+        'int_to_bytes': lambda: functools.partial(bso.int_to_bytes, bso.bytes_to_int(data())),
+        'bytes_to_int': lambda: functools.partial(bso.bytes_to_int, data()),
+        'byte_len': lambda: functools.partial(bso.byte_len, bso.bytes_to_int(data())),
+    }
+
+def time_call(function, repeats = 3):
+    """Returns the best time in seconds for a single call of function"""
+    timer = timeit.Timer(function)
+
+    #Calibrate the number of calls per measurement from a single call
+    elapsed = timer.timeit(1)
+    number = max(1, int(MIN_TIME/max(elapsed, 1e-9)))
+    if number > 1:
+        elapsed = timer.timeit(number)
+
+    best = elapsed
+    for _ in range(1, repeats):
+        best = min(best, timer.timeit(number))
+
+    return best/number
+
+def run(sizes = SIZES, names = None, repeats = 5):
+    """Times every function at every size. The machine's speed drifts over
+    a run, so rather than timing each function repeatedly in one go, every
+    function is timed once per pass over all of them and the best of the
+    passes is kept.
+
+    Args:
+        sizes (list<int>) = SIZES: input sizes in bytes
+        names (list<str>) = None: functions to time. If None, times all
+        repeats (int) = 5: number of passes
+
+    returns:
+        dict: results[name][str(size)] = seconds per call
+    """
+    results = {}
+
+    for repeat in range(0, repeats):
+        for size in sizes:
+            for name, build in sorted(_cases(size).items()):
+                if names is not None and name not in names:
+                    continue
+                if size > MAX_SIZES.get(name, size):
+                    continue
+
+                function = build()
+                seconds = time_call(function, 1)
+                del function
+
+                timings = results.setdefault(name, {})
+                timings[str(size)] = min(seconds, timings.get(str(size), seconds))
+                if repeat == repeats - 1:
+                    print('{:26} {:>10} B {:>14.3f} us'.format(name, size, timings[str(size)]*1e6))
+                    sys.stdout.flush()
+
+    return results
+
+def compare(results, baseline, threshold = 0.25, min_delta = MIN_DELTA):
+    """Compares results against a baseline
+
+    Args:
+        results (dict): output of run
+        baseline (dict): output of run from an earlier version
+        threshold (float) = 0.25: allowed fractional slow down
+        min_delta (float) = MIN_DELTA: allowed slow down in seconds per call.
+            A function is only reported if it is slower by more than both
+
+    returns:
+        list<str>: description of each regression
+    """
+    regressions = []
+
+    for name, timings in sorted(results.items()):
+        for size, seconds in sorted(timings.items(), key=lambda item: int(item[0])):
+            expected = baseline.get(name, {}).get(size)
+            if expected is None:
+                continue
+
+            if seconds > expected*(1 + threshold) and seconds - expected > min_delta:
+                regressions.append('{} at {} B: {:.3f} us vs baseline {:.3f} us ({:+.0%})'.format(
+                    name, size, seconds*1e6, expected*1e6, seconds/expected - 1))
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='baseline JSON file to compare against or save to')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='write the results to the baseline file instead of comparing')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed fractional slow down, default 0.25')
+    parser.add_argument('--max-size', type=int, default=SIZES[-1],
+                        help='largest input size in bytes')
+    parser.add_argument('--min-delta', type=float, default=MIN_DELTA,
+                        help='allowed slow down in seconds per call, default ' + str(MIN_DELTA))
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='number of passes over the functions, default 5')
+    parser.add_argument('names', nargs='*', help='only time these functions')
+    args = parser.parse_args()
+
+    sizes = [size for size in SIZES if size <= args.max_size]
+    results = run(sizes, args.names or None, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        return
+
+    #A missing baseline fails the run, otherwise a check which can not
+    #compare anything would always pass
+    if not os.path.exists(args.baseline):
+        print('No baseline at ' + args.baseline + ', run with --save-baseline first')
+        sys.exit(1)
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+
+    regressions = compare(results, baseline, args.threshold, args.min_delta)
+    for regression in regressions:
+        print('REGRESSION ' + regression)
+
+    if regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
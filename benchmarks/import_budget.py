@@ -0,0 +1,163 @@
+"""Checks that importing each cryptopalsmod module stays within a time budget.
+Import time is measured with python -X importtime in a fresh interpreter, after
+a warm up import so that bytecode is already cached, and compared with the
+import time of a reference stdlib module measured in the same run. Heavy
+optional dependencies (Crypto, bitarray, flask, requests) are imported on
+first use so they do not count towards these budgets.
+
+Usage:
+    python -m benchmarks.import_budget [--repeats N] [--scale S]
+
+Exits with status 1 if any module is over budget.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+#Every module is measured against the import of REFERENCE_MODULE in the same
+#run, so that the budgets hold on slower or busier machines. It is a stdlib
+#module which is not imported at start up and which, like most of
+#cryptopalsmod, is mostly python code.
+REFERENCE_MODULE = 'collections'
+
+#Cumulative import time budgets, as multiples of the import time of
+#REFERENCE_MODULE. Roughly 3x the ratio measured on a development machine with
+#a warm bytecode cache.
+BUDGETS = {
+    'cryptopalsmod.bytestringops': 2,
+    'cryptopalsmod.stringops': 1,
+    'cryptopalsmod.fileops': 2,
+    'cryptopalsmod.number_theory': 1,
+    'cryptopalsmod.xorattacks': 6,
+    'cryptopalsmod.aes_ecb_attacks': 3,
+    'cryptopalsmod.aes_cbc_attacks': 2.5,
+    'cryptopalsmod.aes_ctr_attacks': 6,
+    'cryptopalsmod.rsa_attacks': 2.5,
+    'cryptopalsmod.dsa_attacks': 2.5,
+    'cryptopalsmod.mac_attacks': 3,
+    'cryptopalsmod.hmac': 2,
+    'cryptopalsmod.mersenne_twister_attacks': 2.5,
+    'cryptopalsmod.ciphers.aes_cbc': 2,
+    'cryptopalsmod.ciphers.aes_ctr': 2,
+    'cryptopalsmod.ciphers.aes_ecb': 2,
+    'cryptopalsmod.ciphers.rsa': 1.5,
+    'cryptopalsmod.ciphers.dsa': 25,
+    'cryptopalsmod.ciphers.dsa_fake': 10,
+    'cryptopalsmod.ciphers.diffiehellman': 1.5,
+    'cryptopalsmod.ciphers.mt_cipher': 3,
+    'cryptopalsmod.hash.sha1': 2,
+    'cryptopalsmod.hash.md4': 2.5,
+    'cryptopalsmod.random.mersenne_twister': 1.5,
+    'cryptopalsmod.srp.srpserver': 30,
+    'cryptopalsmod.srp.srpclient': 30,
+    'cryptopalsmod.srp.simplified_srpserver': 30,
+    'cryptopalsmod.srp.simplified_srpclient': 30,
+    'cryptopalsmod.srp.malicious_srp': 32.5,
+}
+
+def _child_env():
+    """Environment for the child interpreter. Bytecode writing is enabled so
+    the warm up import caches it."""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+def _import_time(module, env):
+    """Imports module in a fresh interpreter and returns its cumulative
+    import time in microseconds"""
+    command = [sys.executable, '-X', 'importtime', '-c', 'import ' + module]
+    result = subprocess.run(command, env=env, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+
+    #Lines look like 'import time:  self [us] | cumulative | name'
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+
+    raise Exception(module + ' was not imported, is it imported at start up?')
+
+def _warm_up(module, env):
+    """Imports module once so that bytecode compilation is not measured"""
+    subprocess.run([sys.executable, '-c', 'import ' + module], env=env, check=True)
+
+def measure_import_time(module, repeats = 5):
+    """Returns the smallest cumulative import time of module over repeats runs
+
+    Args:
+        module (str): dotted module name
+        repeats (int) = 5: number of fresh interpreters to measure
+
+    returns:
+        int: import time in microseconds
+    """
+    env = _child_env()
+    _warm_up(module, env)
+
+    return min(_import_time(module, env) for _ in range(0, repeats))
+
+def measure_relative_import_time(module, repeats = 10, reference = REFERENCE_MODULE):
+    """Measures the import time of module relative to the import time of
+    reference. Runs of module and reference are interleaved, so a slow patch
+    of the machine slows both down together. Noise only ever adds time, so
+    the smallest time of each is used.
+
+    Args:
+        module (str): dotted module name
+        repeats (int) = 10: number of pairs of fresh interpreters to measure
+        reference (str) = REFERENCE_MODULE: dotted module name
+
+    returns:
+        tuple: (smallest import time of module in microseconds (int), ratio
+        of the smallest import times of module and reference (float))
+    """
+    env = _child_env()
+    _warm_up(reference, env)
+    _warm_up(module, env)
+
+    times = []
+    reference_times = []
+    for _ in range(0, repeats):
+        reference_times.append(_import_time(reference, env))
+        times.append(_import_time(module, env))
+
+    return min(times), min(times)/min(reference_times)
+
+def check_budgets(budgets = BUDGETS, repeats = 10, scale = 1.0):
+    """Measures every module in budgets and prints a report
+
+    Args:
+        budgets (dict) = BUDGETS: module name -> budget in multiples of the
+            import time of REFERENCE_MODULE
+        repeats (int) = 10: see measure_relative_import_time
+        scale (float) = 1.0: multiplier applied to every budget
+
+    returns:
+        list<str>: modules which are over budget
+    """
+    over_budget = []
+
+    for module, budget in sorted(budgets.items()):
+        budget *= scale
+        elapsed, ratio = measure_relative_import_time(module, repeats)
+        status = 'ok' if ratio <= budget else 'OVER'
+        print('{:45} {:>8} us {:>6.2f}x / {:>6.2f}x  {}'.format(module, elapsed, ratio, budget, status))
+
+        if ratio > budget:
+            over_budget.append(module)
+
+    return over_budget
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--scale', type=float, default=1.0)
+    args = parser.parse_args()
+
+    if check_budgets(repeats=args.repeats, scale=args.scale):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Times the operations in cryptopalsmod.number_theory with every available
+backend (see number_theory.set_backend) and reports the speed up of each
+backend over the original pure python loops.
+
+Usage:
+    python -m benchmarks.number_theory_bench [--repeats N] [names ...]
+"""
+
+import argparse
+import random
+import sys
+
+import cryptopalsmod.number_theory as nt
+from benchmarks.bytestringops_bench import time_call
+
+def _cases():
+    """Returns a dict of name -> function of no arguments which calls the
+    number_theory function of that name on cryptographically sized inputs"""
+    rng = random.Random(0)
+    prime = nt.NIST_PRIME
+    value = rng.randrange(2, prime)
+    exponent = rng.randrange(2, prime)
+    modulus = rng.getrandbits(2048) | 1
+    cube = rng.getrandbits(3072)
+    moduli = [rng.getrandbits(1024) | 1 for _ in range(0, 3)]
+    while nt.gcd(moduli[0], moduli[1]) > 1 or nt.gcd(moduli[0], moduli[2]) > 1 or nt.gcd(moduli[1], moduli[2]) > 1:
+        moduli = [rng.getrandbits(1024) | 1 for _ in range(0, 3)]
+    congruences = [rng.randrange(0, mod) for mod in moduli]
+
+    return {
+        'modexp': lambda: nt.modexp(value, exponent, prime),
+        'invmod': lambda: nt.invmod(value, prime),
+        'extended_euc': lambda: nt.extended_euc(value, modulus),
+        'gcd': lambda: nt.gcd(value, modulus),
+        'newton_root': lambda: nt.newton_root(3, cube),
+        'chinese_remainder_theorem': lambda: nt.chinese_remainder_theorem(congruences, moduli),
+    }
+
+def run(backends, names = None, repeats = 3):
+    """Times every operation with every backend
+
+    Args:
+        backends (list<str>): backend names
+        names (list<str>) = None: operations to time. If None, times all
+        repeats (int) = 3: see bytestringops_bench.time_call
+
+    returns:
+        dict: results[name][backend] = seconds per call
+    """
+    results = {}
+    previous = nt.get_backend().name
+
+    try:
+        for backend in backends:
+            nt.set_backend(backend)
+            for name, function in sorted(_cases().items()):
+                if names is not None and name not in names:
+                    continue
+                results.setdefault(name, {})[backend] = time_call(function, repeats)
+    finally:
+        nt.set_backend(previous)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('names', nargs='*', help='only time these operations')
+    args = parser.parse_args()
+
+    backends = nt.available_backends()
+    results = run(backends, args.names or None, args.repeats)
+
+    print('{:26}'.format('') + ''.join('{:>22}'.format(backend) for backend in backends))
+    for name, timings in sorted(results.items()):
+        row = '{:26}'.format(name)
+        for backend in backends:
+            seconds = timings[backend]
+            row += '{:>12.1f} us {:>5.1f}x'.format(seconds*1e6, timings['python']/seconds)
+        print(row)
+        sys.stdout.flush()
+
+if __name__ == '__main__':
+    main()
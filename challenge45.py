@@ -2,6 +2,7 @@ from cryptopalsmod.ciphers import dsa
 from cryptopalsmod.hash.sha1 import SHA1
 import secrets
 import cryptopalsmod.number_theory as nt
+from cryptopalsmod import bytestringops as bso
 
 class ChallengeDSAUser(dsa.DSAUser):
     """Current implementation of dsa does not allow for r = 0. This one does so
@@ -17,7 +18,7 @@ class ChallengeDSAUser(dsa.DSAUser):
  
         k_inv = nt.invmod(k, self.q)
  
-        msg_hash = int(self.hash(message).hexdigest(), 16)
+        msg_hash = bso.bytes_to_int(self.hash(message).digest())
         s = (k_inv * (msg_hash + self.secret_key * r)) % self.q
         
         return self.public_key, r, s
@@ -26,12 +27,12 @@ class ChallengeDSAUser(dsa.DSAUser):
     
         s_inv = nt.invmod(s, self.q)
         
-        msg_hash = int(self.hash(message).hexdigest(), 16)
+        msg_hash = bso.bytes_to_int(self.hash(message).digest())
         exp1 = msg_hash * s_inv % self.q
         
         exp2 = r * s_inv % self.q
         
-        v = ((nt.modexp(self.g, exp1, self.p) * nt.modexp(public_key, exp2, self.p)) % self.p) % self.q
+        v = nt.multi_exp([(self.g, exp1), (public_key, exp2)], self.p) % self.q
 
         return v == r
 
@@ -1,11 +1,15 @@
 import cryptopalsmod.bytestringops as bso
+import cryptopalsmod.scoring as scoring
+import collections
+import heapq
 
 def fixed_nonce_attack(ciphertexts):
     """Takes a number of list of ciphertexts encrypted independently using the 
     same nonce and secret key. Decrypts by treating the ciphertexts as an XOR. 
     More accurate if there is more ciphertexts of longer length. May be 
     inaccurate at the end of the ciphertext if the number of ciphertexts at a
-    given length is reduced.
+    given length is reduced. Each keystream byte is recovered from the column
+    of ciphertext bytes at that position, see many_time_pad_attack.
     
     Args:
         ciphertexts (List<bytes>) : list of ciphertexts to be decrypted. The more
@@ -15,20 +19,54 @@ def fixed_nonce_attack(ciphertexts):
         bytes : XORing this value with the cipherdects will give the estimated
             decryption
     """
-    lengths = [len(ciphertext) for ciphertext in ciphertexts]
-    lengths = sorted(list(set(lengths)))
-    
-    previous = 0
-    key = b''
-    for key_length in lengths:
-        shortened_ciphertexts = [ciphertext[previous:key_length] for ciphertext in ciphertexts if len(ciphertext) > previous]
-        joined_ciphertexts = b''.join(shortened_ciphertexts)
-
-        key += xorattacks.repeatedXOR_attack_key(joined_ciphertexts, key_length - previous)
-        
-        previous = key_length
-    
-    return key
+    return many_time_pad_attack(ciphertexts)[0]
+
+def many_time_pad_attack(ciphertexts, model = None):
+    """Recovers the keystream shared by a list of ciphertexts, eg fixed nonce
+    CTR, along with how confident each byte of it is.
+
+    The ciphertexts are laid out as the rows of one zero padded buffer with a
+    mask of which bytes are real, so each column is a single extended slice.
+    Each column is counted once, the padding is taken off the count using the
+    mask, and the model scores all 256 candidate keystream bytes from the
+    counts. Handles hundreds of thousands of ciphertexts.
+
+    Args:
+        ciphertexts (list<bytes>): ciphertexts encrypted with the same keystream
+        model = None (scoring.ScoringModel): model used to score candidates.
+            If None, uses scoring.ENGLISH_FREQUENCY. Must support
+            histogram_key_scores
+
+    returns:
+        tuple: (keystream (bytes), confidence (list<float>)). confidence[i] is
+        how much the best candidate for keystream byte i outscored the second
+        best, per ciphertext long enough to reach byte i. Near 0 means the
+        byte is a guess
+    """
+    if model is None:
+        model = scoring.ENGLISH_FREQUENCY
+
+    ciphertexts = [bytes(ciphertext) for ciphertext in ciphertexts]
+    width = max([len(ciphertext) for ciphertext in ciphertexts], default=0)
+
+    padded = b''.join(ciphertext.ljust(width, b'\x00') for ciphertext in ciphertexts)
+    mask = b''.join((b'\x01'*len(ciphertext)).ljust(width, b'\x00') for ciphertext in ciphertexts)
+
+    keystream = bytearray()
+    confidence = []
+    for index in range(0, width):
+        valid = mask[index::width].count(1)
+
+        histogram = collections.Counter(padded[index::width])
+        histogram[0] -= len(ciphertexts) - valid
+
+        scores = model.histogram_key_scores(histogram)
+        best, second = heapq.nlargest(2, range(0, 256), key=scores.__getitem__)
+
+        keystream.append(best)
+        confidence.append((scores[best] - scores[second])/valid)
+
+    return bytes(keystream), confidence
 
 
 def read_write_attack(ciphertext, edit):
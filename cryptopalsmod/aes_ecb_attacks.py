@@ -1,7 +1,7 @@
 """ A collection of functions which are used for attacking AES_ECB encryption
  when solving the cryptopals challenges"""
-import secrets
 import collections
+import cryptopalsmod.bytestringops as bso
 
 
 
@@ -20,8 +20,7 @@ def num_of_repeats(bytestring, blocklength = 16):
     Returns:
         int: tally of blocks which repeat
     """
-    blocks = [bytestring[i:i+blocklength] for i in range(0, len(bytestring), blocklength)]
-    repeat_counter = collections.Counter(blocks)
+    repeat_counter = collections.Counter(bso.BlockView(bytestring, blocklength))
     
     repeats = 0
     for block in repeat_counter.keys():
@@ -37,9 +36,7 @@ def detect_ECB(ciphertext, blocklength = 16):
     of ciphertext. The function returns True if a repeated block is found,False
     otherwise"""
 
-    blocks = [ciphertext[i:i+blockLength] for i in range(0, len(ciphertext), blockLength)]
-
-    counter = collections.Counter(blocks)
+    counter = collections.Counter(bso.BlockView(ciphertext, blocklength))
 
     for block in counter.keys():
         if counter[block] > 1:
@@ -99,12 +96,12 @@ def first_block_which_repeats_pos(bytestring, blocklength = 16):
             length of bytestring if no such block exists.
     """
 
-    blocks = [bytestring[i:i+blocklength] for i in range(0, len(bytestring), blocklength)]
+    blocks = bso.BlockView(bytestring, blocklength)
     repeat_counter = collections.Counter(blocks)
 
     for index, block in enumerate(blocks):
         if repeat_counter[block] > 1:
-            return index*16
+            return index*blocklength
     
     return len(bytestring)
 
@@ -124,6 +121,8 @@ def determine_prepad_length(oracle, blocklength = 16):
         int: number ogf bytes which the oracle prefixs to any plaintext, assuming
         this is a fixed number
     """ 
+    import secrets
+
     junk_chars = 0
     initail_num_repeats = num_of_repeats(oracle.encrypt(b''), blocklength=blocklength)
     current_num_repeats = initail_num_repeats
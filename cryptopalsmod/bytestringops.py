@@ -1,8 +1,7 @@
 """ A collection of functions which are used for manipulating bytes when
 solving the cryptopals challenges"""
 
-import base64
-import bitarray
+import binascii
 
 def hex_to_bytes(hex_string):
     """Converts a encoded string of hex values to a bytes object
@@ -24,7 +23,8 @@ def bytes_to_64(byte_string):
     returns:
         str: string in base 64 from byte_string
     """ 
-    return base64.b64encode(byte_string).decode()
+    #binascii gives the same result as base64.b64encode without importing re
+    return binascii.b2a_base64(byte_string, newline=False).decode()
 
 def hex_to_64(hex_string):
     """Converts a string of hex to a string in base 64
@@ -48,6 +48,23 @@ def bytes_to_hex(byte_string):
     """
     return byte_string.hex()
 
+def _bulk_xor(bytestring1, bytestring2, length):
+    """XORs two bytes like objects of length length by treating each as one
+    big integer. Conversion and XOR are linear in the input size and run in C,
+    so this is the engine behind every XOR function in this module.
+
+    Args:
+        bytestring1(bytes): argument of XOR
+        bytestring2(bytes): argument of XOR, same length as bytestring1
+        length(int): length of both inputs and of the output
+
+    returns:
+        bytes: bytewise XOR of bytestring1 and bytestring2
+    """
+    value = int.from_bytes(bytestring1, 'big') ^ int.from_bytes(bytestring2, 'big')
+
+    return value.to_bytes(length, 'big')
+
 def FixedXOR(bytestring1, bytestring2):
     """Takes two byte like objects of equal lengths and returns a bytearray of
      the XOR
@@ -64,9 +81,7 @@ def FixedXOR(bytestring1, bytestring2):
     #in one of the cryptopals challenges
     assert len(bytestring1) == len(bytestring2)
 
-    output = bytes([byte1^byte2 for (byte1, byte2) in zip(bytestring1, bytestring2)])
-
-    return output
+    return _bulk_xor(bytestring1, bytestring2, len(bytestring1))
 
 def repeatedXOR(bytestring1, bytestring2):
     """Takes two bytestrings and XORs them bytewise repeating the bytes or the smaller bytestring
@@ -89,13 +104,15 @@ def repeatedXOR(bytestring1, bytestring2):
         temp = bytestring1
         bytestring1 = bytestring2
         bytestring2 = temp
-        
-    output = b''
 
-    for index, byte in enumerate(bytestring1):
-        output += bytes([byte ^ bytestring2[index % len(bytestring2)]])
-    
-    return output
+    length = len(bytestring1)
+
+    #Build the repeated key once, then XOR it against the longer input in a
+    #single pass
+    repeats = -(-length // len(bytestring2)) if length else 0
+    keystream = (bytes(bytestring2) * repeats)[:length]
+
+    return _bulk_xor(bytestring1, keystream, length)
 
 def zipXOR(bytestring1, bytestring2):
     """Takes two bytes like objects of and returns a bytes object of
@@ -108,8 +125,60 @@ def zipXOR(bytestring1, bytestring2):
     returns:
         bytes: bytewise XOR of bytesting1 and bytestring2
     """
-    return bytes([byte1^byte2 for (byte1, byte2) in zip(bytestring1, bytestring2)])
-    
+    length = min(len(bytestring1), len(bytestring2))
+
+    #memoryview slices avoid copying the longer input before the XOR
+    return _bulk_xor(memoryview(bytestring1)[:length],
+                     memoryview(bytestring2)[:length],
+                     length)
+
+#Number of bytes XORed at a time by repeated_xor_into, so that the repeated
+#key never has to be built for the whole destination
+XOR_CHUNK_SIZE = 2**16
+
+def xor_into(dst, src, offset = 0):
+    """XORs src into the writable buffer dst in place, starting at position
+    offset of dst. dst can be anything that supports the buffer protocol and
+    is writable, eg bytearray, memoryview or mmap.
+
+    Args:
+        dst (bytearray): writable buffer which is modified in place
+        src (bytes): bytes to XOR into dst
+        offset = 0 (int): position in dst of the first byte to XOR
+
+    raises:
+        Exception('src does not fit in dst') if offset + len(src) > len(dst)
+    """
+    view = memoryview(dst).cast('B')
+    end = offset + len(src)
+
+    if offset < 0 or end > len(view):
+        raise Exception('src does not fit in dst')
+
+    view[offset:end] = _bulk_xor(view[offset:end], src, len(src))
+
+def repeated_xor_into(dst, key):
+    """XORs the writable buffer dst in place with key, repeating key as many
+    times as needed. This is the in place version of repeatedXOR when dst is
+    the longer argument.
+
+    Args:
+        dst (bytearray): writable buffer which is modified in place
+        key (bytes): key to repeat across dst
+    """
+    view = memoryview(dst).cast('B')
+    if len(view) == 0:
+        return
+
+    #Work in chunks that are a multiple of the key length so that every chunk
+    #starts at the beginning of the key
+    chunk_size = max(1, XOR_CHUNK_SIZE//len(key))*len(key)
+    keystream = bytes(key)*(chunk_size//len(key))
+
+    for start in range(0, len(view), chunk_size):
+        end = min(start + chunk_size, len(view))
+        xor_into(view, memoryview(keystream)[:end - start], start)
+
 def bytes_to_bits(bytestring):
     """Takes a bytes like object and returns a bitarray
     
@@ -119,6 +188,7 @@ def bytes_to_bits(bytestring):
     returns:
         bitarray: bitarray obtains from the bytestring
     """
+    import bitarray
 
     bits = bitarray.bitarray()
     bits.frombytes(bytestring)
@@ -126,32 +196,64 @@ def bytes_to_bits(bytestring):
     return bits
 
 
+def _popcount(number):
+    """Returns the number of set bits in a non-negative integer"""
+    return bin(number).count('1')
+
+if hasattr(int, 'bit_count'):
+    #Python 3.10+ has a native popcount
+    _popcount = int.bit_count
+
 def HammingDistance(bytestring1, bytestring2):
-    """Computes the Hamming distance between two bytes objects AFTER converting
-    them into sequences of bits. Hamming distance is the number of positions 
-    where the sequences differ. If the bytes are of different length, the 
-    larger is shortened via the zip function.
+    """Computes the Hamming distance between two bytes objects, ie the number
+    of bit positions where they differ. Both are read as big integers, XORed
+    and the set bits of the result counted. If the bytes are of different
+    length, the longer is truncated to the length of the shorter.
     
     Args:
         bytestring1(bytes): argument of distance
         bytestring2(bytes): argument of distance
 
     returns:
-        bytes: hamming distance between the bytestring1 and bytestring2
+        int: hamming distance between the bytestring1 and bytestring2
 
     """
   
-    # Convert bytes to bits
-    bitstring1 = bytes_to_bits(bytestring1)
-    bitstring2 = bytes_to_bits(bytestring2)
+    length = min(len(bytestring1), len(bytestring2))
 
-    distance = 0
-    for (bit1, bit2) in zip(bitstring1, bitstring2):
-        if bit1 != bit2:
-            distance += 1
+    #Differing bits are the set bits of the XOR, so count them a whole word at
+    #a time rather than bit by bit
+    difference = (int.from_bytes(memoryview(bytestring1)[:length], 'big')
+                  ^ int.from_bytes(memoryview(bytestring2)[:length], 'big'))
+
+    return _popcount(difference)
+
+def pairwise_hamming(blocks):
+    """Computes the Hamming distance between every pair of blocks in a list of
+    equal length bytes objects. Each block is converted to an integer only
+    once, so each entry of the matrix costs one XOR and one popcount.
+
+    Args:
+        blocks(list<bytes>): blocks of equal length
+
+    returns:
+        list<list<int>>: matrix where entry [i][j] is the hamming distance
+            between blocks[i] and blocks[j]
+    """
+    if len(set(len(block) for block in blocks)) > 1:
+        raise Exception('blocks must all have the same length')
+
+    values = [int.from_bytes(block, 'big') for block in blocks]
+
+    matrix = [[0]*len(values) for _ in values]
+    for i, value1 in enumerate(values):
+        for j in range(i + 1, len(values)):
+            distance = _popcount(value1 ^ values[j])
+            matrix[i][j] = distance
+            matrix[j][i] = distance
+
+    return matrix
 
-    return distance
-    
 def transpose_by_blocklength(bytestring, blocklength):
     """Splits a bytes object into a list of bytes objects as follows:
     the ith element of the list will contain the ith element of the input, plus
@@ -170,18 +272,7 @@ def transpose_by_blocklength(bytestring, blocklength):
         list: a list of bytes
     """
 
-    transpose = []
-    for remainder in range(0, blocklength):
-        increment = 0
-        row = b''
-        while increment*blocklength + remainder < len(bytestring):
-            character = bytes([bytestring[increment*blocklength + remainder]])
-            row += character
-            increment += 1
-        
-        transpose.append(row)
-    
-    return transpose
+    return BlockMatrix(bytestring, blocklength).columns()
 
 def pad_pkcs7(bytestring, desired_length):
     """Pads a bytes object until it is the desired length using PKCS#7 padding
@@ -227,16 +318,30 @@ def pad_by_multiple(bytestring, padding_multiple, extra_block = False):
         bytes: padded bytestring
     """
 
-    block_num = 0
-    while block_num*padding_multiple < len(bytestring):
-        block_num += 1
+    return bytestring + pkcs7_padding(len(bytestring), padding_multiple, extra_block)
 
-    desired_length = block_num*padding_multiple
+def pkcs7_padding(length, padding_multiple, extra_block = False):
+    """Returns the PKCS#7 padding that pad_by_multiple would append to a bytes
+    object of length length, without needing the bytes object itself.
 
-    if extra_block and desired_length == len(bytestring):
-        desired_length += padding_multiple
+    Args:
+        length(int): length of the bytes object to be padded
+        padding_multiple(int): number to which the length of padded bytes is to 
+            be a multiple of
+        extra_block = False (bool): if set to True, some padding will be done,
+            even if it means adding an extra block of only padding
 
-    return pad_pkcs7(bytestring, desired_length)
+    returns:
+        bytes: padding to append
+    """
+    padding_length = -length % padding_multiple
+
+    if extra_block and padding_length == 0:
+        padding_length = padding_multiple
+
+    assert padding_length <= 255
+
+    return bytes(padding_length*[padding_length])
 
 def remove_padding_pkcs7(bytestring):
     """Determines wether a string has been padded correctly using PKCS#7. A
@@ -257,19 +362,275 @@ def remove_padding_pkcs7(bytestring):
 
     return bytestring[:-last_byte]
 
-def int_to_bytes(number):
-    """Converts a number to a bytes object with as small a length as possible
+def byte_len(number):
+    """Returns the number of bytes needed to store a non-negative integer"""
+    return (number.bit_length() + 7)//8
+
+def int_to_bytes(number, length = None):
+    """Converts a non-negative integer to a big endian bytes object. If length
+    is not set, the bytes object is as short as possible (but at least one
+    byte long). The length is computed directly from the bit length of number.
+
+    Args:
+        number (int): integer to be converted
+        length (int) = None: length of the output. If None, the minimal length
+            is used
+
+    returns:
+        bytes: number as big endian bytes
+
+    raises:
+        OverflowError if number does not fit in length bytes
     """
+    if length is None:
+        length = max(1, byte_len(number))
 
-    start_length = 1
-    while True:
-        try:
-            return number.to_bytes(start_length, byteorder='big')
-        except OverflowError:
-            start_length += 1
+    return number.to_bytes(length, byteorder='big')
 
-def byte_len(number):
-    
-    return (number.bit_length() + 7)//8
-    
+def bytes_to_int(bytestring):
+    """Converts a big endian bytes like object to a non-negative integer. This
+    replaces round trips through hex such as int(bytes_to_hex(b), 16) or
+    int(hash.hexdigest(), 16)
+
+    Args:
+        bytestring (bytes): bytes to be converted
+
+    returns:
+        int
+    """
+    return int.from_bytes(bytestring, byteorder='big')
+
+def ints_to_bytes(numbers, length = None):
+    """Converts a list of non-negative integers using int_to_bytes
+
+    Args:
+        numbers (list<int>): integers to be converted
+        length (int) = None: length of every output. If None, each output is
+            as short as possible
+
+    returns:
+        list<bytes>
+    """
+    return [int_to_bytes(number, length) for number in numbers]
+
+def bytes_to_ints(bytestrings):
+    """Converts a list of big endian bytes like objects using bytes_to_int
+
+    Args:
+        bytestrings (list<bytes>): bytes to be converted
+
+    returns:
+        list<int>
+    """
+    return [int.from_bytes(bytestring, byteorder='big') for bytestring in bytestrings]
+
+class Padder(object):
+    """Pads a message that arrives in chunks, as pad_by_multiple would pad the
+    whole message. Only the bytes that do not yet fill a block are held back,
+    so memory use does not grow with the size of the message.
+
+    Eg:
+        padder = Padder(16)
+        output = padder.update(chunk1) + padder.update(chunk2) + padder.finalize()
+        output == pad_by_multiple(chunk1 + chunk2, 16)
+
+    Args (__init__):
+        padding_multiple (int): number to which the length of padded bytes is to 
+            be a multiple of
+        extra_block = False (bool): see pad_by_multiple
+    """
+
+    def __init__(self, padding_multiple, extra_block = False):
+        self.padding_multiple = padding_multiple
+        self.extra_block = extra_block
+        self.length = 0
+        self._pending = bytearray()
+
+    def update(self, chunk):
+        """Adds the next chunk of the message. Returns the bytes which are ready,
+        always a whole number of blocks"""
+        self.length += len(chunk)
+        self._pending += chunk
+
+        ready = len(self._pending) - len(self._pending) % self.padding_multiple
+        output = bytes(self._pending[:ready])
+        del self._pending[:ready]
+
+        return output
+
+    def finalize(self):
+        """Returns the held back bytes followed by the padding"""
+        output = bytes(self._pending) + pkcs7_padding(self.length, self.padding_multiple, self.extra_block)
+        self._pending = bytearray()
+
+        return output
+
+class Unpadder(object):
+    """Removes PKCS#7 padding from a message that arrives in chunks, as
+    remove_padding_pkcs7 would from the whole message. The final block is
+    always held back until finalize is called, so the padding must be no
+    longer than blocklength (as produced by pad_by_multiple).
+
+    Args (__init__):
+        blocklength (int): length of the blocks the message was padded to
+    """
+
+    def __init__(self, blocklength):
+        self.blocklength = blocklength
+        self._pending = bytearray()
+
+    def update(self, chunk):
+        """Adds the next chunk of the padded message. Returns the bytes which
+        can not contain padding"""
+        self._pending += chunk
+
+        ready = len(self._pending) - len(self._pending) % self.blocklength
+        if ready == len(self._pending):
+            ready -= self.blocklength
+        ready = max(ready, 0)
+
+        output = bytes(self._pending[:ready])
+        del self._pending[:ready]
+
+        return output
+
+    def finalize(self):
+        """Checks and removes the padding from the held back bytes. Thows an
+        exception if the padding is invalid"""
+        output = remove_padding_pkcs7(bytes(self._pending))
+        self._pending = bytearray()
+
+        return output
+
+class BlockView(object):
+    """View of a bytes like object as a sequence of blocks of length
+    blocklength. Blocks are memoryview slices of the original object so no
+    bytes are copied. Optional padding is treated as if it had been appended
+    to the end of the object: only the final block(s) that contain padding
+    are built as new bytes objects.
+
+    Blocks taken from a bytes object can be hashed and compared to bytes, so a
+    BlockView can be passed straight to collections.Counter or set.
+
+    Eg:
+        list(BlockView(b'ABCDEFG', 3)) -> [b'ABC', b'DEF', b'G'] (as memoryviews)
+        list(BlockView(b'ABCDEFG', 4, b'\x01')) -> [b'ABCD', b'EFG\x01']
+
+    Args (__init__):
+        bytestring (bytes): bytes like object to be split into blocks
+        blocklength (int): the length of the blocks
+        padding (bytes) = b'': bytes treated as appended to bytestring
+    """
+
+    def __init__(self, bytestring, blocklength, padding = b''):
+        assert blocklength > 0
+
+        self.view = memoryview(bytestring).cast('B')
+        self.blocklength = blocklength
+        self.padding = bytes(padding)
+
+    @classmethod
+    def pkcs7(cls, bytestring, blocklength, extra_block = False):
+        """Returns a BlockView of bytestring padded as by pad_by_multiple"""
+        padding = pkcs7_padding(len(bytestring), blocklength, extra_block)
+        return cls(bytestring, blocklength, padding)
+
+    def __len__(self):
+        total_length = len(self.view) + len(self.padding)
+        return (total_length + self.blocklength - 1)//self.blocklength
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('block index out of range')
+
+        data_length = len(self.view)
+        start = index*self.blocklength
+        end = start + self.blocklength
+
+        if end <= data_length:
+            return self.view[start:end]
+
+        #This block contains padding, so it has to be built
+        end = min(end, data_length + len(self.padding))
+        if start >= data_length:
+            return self.padding[start - data_length:end - data_length]
+
+        return bytes(self.view[start:]) + self.padding[:end - data_length]
+
+    def __iter__(self):
+        for index in range(0, len(self)):
+            yield self[index]
+
+    def tail(self):
+        """Returns the final block if it is shorter than blocklength, otherwise
+        an empty bytes object"""
+        if len(self) == 0 or len(self[-1]) == self.blocklength:
+            return b''
+        return bytes(self[-1])
+
+
+class BlockMatrix(object):
+    """Views bytes as a matrix whose rows are blocks and whose columns are
+    every byte at the same position within a block. Rows are memoryview
+    slices and each column is built with a single extended slice, so
+    building every column is linear in the size of the input.
+
+    The matrix can be built from one bytes object split into rows of length
+    blocklength (the last row may be short), or from a list of ragged rows
+    using from_rows. In both cases column i only contains bytes from rows
+    which are longer than i.
+
+    Eg:
+        BlockMatrix(b'ABCDEFG', 3).columns() -> [b'ADG', b'BE', b'CF']
+        BlockMatrix.from_rows([b'AB', b'CDE']).columns() -> [b'AC', b'BD', b'E']
+
+    Args (__init__):
+        bytestring (bytes): bytes like object to be split into rows
+        blocklength (int): the length of the rows
+    """
 
+    def __init__(self, bytestring, blocklength):
+        assert blocklength > 0
+
+        self.view = memoryview(bytestring).cast('B')
+        self.num_columns = blocklength
+        self.num_rows = (len(self.view) + blocklength - 1)//blocklength
+        self._rows = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds a matrix from a list of bytes like objects of any lengths,
+        eg ciphertexts encrypted with the same keystream"""
+        matrix = cls(b'', 1)
+        matrix._rows = [memoryview(row).cast('B') for row in rows]
+        matrix.num_rows = len(matrix._rows)
+        matrix.num_columns = max([len(row) for row in matrix._rows], default=0)
+        return matrix
+
+    def row(self, index):
+        """Returns row index as a memoryview"""
+        if self._rows is not None:
+            return self._rows[index]
+        return BlockView(self.view, self.num_columns)[index]
+
+    def rows(self):
+        """Returns an iterable over the rows"""
+        if self._rows is not None:
+            return iter(self._rows)
+        return iter(BlockView(self.view, self.num_columns))
+
+    def column(self, index):
+        """Returns column index as a bytes object"""
+        if not 0 <= index < self.num_columns:
+            raise IndexError('column index out of range')
+
+        if self._rows is not None:
+            return bytes([row[index] for row in self._rows if len(row) > index])
+
+        return self.view[index::self.num_columns].tobytes()
+
+    def columns(self):
+        """Returns a list of every column as bytes objects"""
+        return [self.column(index) for index in range(0, self.num_columns)]
@@ -1,15 +1,13 @@
-from Crypto.Cipher import AES 
 import cryptopalsmod.bytestringops as bso 
-import secrets
 
 
 class AES_CBC:
     def __init__(self, key, initialistaion_vector):
+        from Crypto.Cipher import AES
         self.cipher = AES.new(key, AES.MODE_ECB)
         self.IV = initialistaion_vector
 
     def encrypt(self, plaintext, IV = None):
-        ciphertext = b''
 
         #There is an option argument to change the IV. Added check that if an 
         #IV has been entered, it has the same length as the origianl.
@@ -18,25 +16,17 @@ class AES_CBC:
         else:
             assert len(IV) == len(self.IV)
         
-        #Always pad plaintext so that padding can be checked for validity
-        plaintext = bso.pad_by_multiple(plaintext, 16, extra_block=True)
+        #Always pad plaintext so that padding can be checked for validity.
+        #The view separates plaintext into blocks without copying it.
+        plaintext_blocks = bso.BlockView.pkcs7(plaintext, 16, extra_block=True)
 
-        #separate plaintext into blocks for encryption.
-        plaintext_blocks = [plaintext[i: i+16] for i in range(0, len(plaintext), 16)]
-
-        #CBC loop
-        previous = IV
-        for block in plaintext_blocks:
-            new_block_to_encrypt = bso.FixedXOR(block, previous)
-            encrypted_block = self.cipher.encrypt(new_block_to_encrypt)
-            previous = encrypted_block
-            ciphertext += encrypted_block
+        ciphertext, _ = self._encrypt_blocks(plaintext_blocks, IV)
 
         return ciphertext
 
     def decrypt(self, ciphertext, IV = None):
 
-        ciphertext_blocks = [ciphertext[i:i+16] for i in range(0, len(ciphertext), 16)]
+        ciphertext_blocks = bso.BlockView(ciphertext, 16)
         #ciphertext should not need padding or something has gone wrong
         
         #There is an option argument to change the IV. Added check that if an 
@@ -46,23 +36,106 @@ class AES_CBC:
         else:
             assert len(IV) == len(self.IV)
 
+        plaintext, _ = self._decrypt_blocks(ciphertext_blocks, IV)
+
+        return plaintext
+
+    def encrypt_stream(self, plaintext_chunks, IV = None):
+        """Same as encrypt but takes the plaintext as an iterable of chunks of
+        any length (eg reads from a file) and yields the ciphertext as it is
+        produced. Padding is added by a bso.Padder, so only a partial block is
+        ever held back.
+
+        Args:
+            plaintext_chunks (iterable<bytes>): chunks of plaintext
+            IV (bytes) = None: IV to use instead of self.IV
+
+        Yields:
+            bytes: ciphertext, a whole number of blocks
+        """
+        if IV == None:
+            IV = self.IV
+        else:
+            assert len(IV) == len(self.IV)
 
+        padder = bso.Padder(16, extra_block=True)
+        
         previous = IV
+        for chunk in plaintext_chunks:
+            ciphertext, previous = self._encrypt_blocks(bso.BlockView(padder.update(chunk), 16), previous)
+            yield ciphertext
 
-        plaintext = b''
-        #CBC loop
+        ciphertext, _ = self._encrypt_blocks(bso.BlockView(padder.finalize(), 16), previous)
+        yield ciphertext
+
+    def decrypt_stream(self, ciphertext_chunks, IV = None, remove_padding = False):
+        """Same as decrypt but takes the ciphertext as an iterable of chunks of
+        any length and yields the plaintext as it is produced. If remove_padding
+        is True the padding is checked and removed by a bso.Unpadder, which 
+        thows an exception if the padding is invalid.
+
+        Args:
+            ciphertext_chunks (iterable<bytes>): chunks of ciphertext
+            IV (bytes) = None: IV to use instead of self.IV
+            remove_padding (bool) = False: remove PKCS#7 padding from the end
+
+        Yields:
+            bytes: plaintext
+        """
+        if IV == None:
+            IV = self.IV
+        else:
+            assert len(IV) == len(self.IV)
+
+        #Used only to hold back partial blocks of ciphertext between chunks
+        aligner = bso.Padder(16)
+        unpadder = bso.Unpadder(16)
+
+        previous = IV
+        for chunk in ciphertext_chunks:
+            plaintext, previous = self._decrypt_blocks(bso.BlockView(aligner.update(chunk), 16), previous)
+
+            if remove_padding:
+                plaintext = unpadder.update(plaintext)
+            yield plaintext
+
+        #ciphertext should not need padding or something has gone wrong
+        assert aligner.finalize() == b''
+
+        if remove_padding:
+            yield unpadder.finalize()
+
+    def _encrypt_blocks(self, plaintext_blocks, previous):
+        """CBC loop for encryption. Returns the ciphertext and the last
+        ciphertext block, which chains into the next call"""
+        ciphertext = []
+
+        for block in plaintext_blocks:
+            new_block_to_encrypt = bso.FixedXOR(block, previous)
+            encrypted_block = self.cipher.encrypt(new_block_to_encrypt)
+            previous = encrypted_block
+            ciphertext.append(encrypted_block)
+
+        return b''.join(ciphertext), previous
+
+    def _decrypt_blocks(self, ciphertext_blocks, previous):
+        """CBC loop for decryption. Returns the plaintext and the last
+        ciphertext block, which chains into the next call"""
+        plaintext = []
 
         for block in ciphertext_blocks:
             decrypted_block = self.cipher.decrypt(block)
             decrypted_block = bso.FixedXOR(decrypted_block, previous)
-            plaintext += decrypted_block
+            plaintext.append(decrypted_block)
             previous = block
-        
-        return plaintext 
+
+        #The last block may be a view of a chunk which is about to be released
+        return b''.join(plaintext), bytes(previous)
 
 
 class AES_CBC_random(AES_CBC):
     """Implements AES_CBC but with a random key and iniaialisation vector. 
     Useful for simulating an oracle"""
     def __init__(self):
-        AES_CBC.__init__(self, secrets.token_bytes(16), secrets.token_bytes(16))
\ No newline at end of file
+        import secrets
+        AES_CBC.__init__(self, secrets.token_bytes(16), secrets.token_bytes(16))
@@ -1,7 +1,5 @@
-from Crypto.Cipher import AES
 import struct
 import cryptopalsmod.bytestringops as bso
-import secrets
 
 class AES_CTR(object):
     def __init__(self, key, nonce, counter_start = 0):
@@ -13,6 +11,7 @@ class AES_CTR(object):
             counter_start (int): initial values of counter used in encryption.
         """
         assert len(key) == 16
+        from Crypto.Cipher import AES
         self.cipher = AES.new(key, AES.MODE_ECB)
         self.nonce = nonce
         self.counter = counter_start
@@ -26,30 +25,41 @@ class AES_CTR(object):
             reset_counter (int) = -1: If nonnegative, counter is set to be this
             counter. 
         """
+        output = bytearray(bytestring)
+        self.encrypt_decrypt_into(output, reset_counter)
+
+        return bytes(output)
+
+    def encrypt_decrypt_into(self, buffer, reset_counter = -1):
+        """Same as encrypt_decrypt but encrypts or decrypts a writable buffer
+        (eg bytearray, memoryview or mmap) in place instead of returning a new
+        bytes object.
+
+        Args:
+            buffer (bytearray): bytes to be encrypted or decrypted in place
+            reset_counter (int) = -1: If nonnegative, counter is set to be this
+            counter. 
+        """
+        view = memoryview(buffer).cast('B')
+
+        #XOR_CHUNK_SIZE is a multiple of 16 so each chunk starts on a new block
+        for start in range(0, len(view), bso.XOR_CHUNK_SIZE):
+            end = min(start + bso.XOR_CHUNK_SIZE, len(view))
+            num_blocks = (end - start + 15)//16
 
-        bytestring = [bytestring[i:i+16] for i in range(0, len(bytestring), 16)]
-        encryption = b''
-        
-        for block in bytestring:
-            
             #Converts nonce and count to bytes of legnth 8 using little endian
-            #and concatenates them
-            concat = struct.pack('<QQ', self.nonce, self.counter)
-            
-            XORBlock = self.cipher.encrypt(concat)
+            #and concatenates them. The whole chunk of counter blocks is
+            #encrypted in one call to build the keystream.
+            counters = b''.join([struct.pack('<QQ', self.nonce, self.counter + i) for i in range(0, num_blocks)])
+            keystream = self.cipher.encrypt(counters)
 
-            encrypted_block = bso.zipXOR(block, XORBlock)
-            
-            encryption += encrypted_block
+            bso.xor_into(view, memoryview(keystream)[:end - start], start)
+
+            self.counter += num_blocks
 
-            self.counter += 1
-        
-        
         if reset_counter >= 0:
             self.counter = reset_counter
 
-        return encryption
-
     def edit(self, ciphertext, offset, new_text):
 
         """takes an encrypted by changes the plaintext at position offset to 
@@ -63,6 +73,7 @@ class AES_CTR(object):
 class AES_CTR_random(AES_CTR):
     """ An AES_CTR but with random key and nonce"""
     def __init__(self):
+        import secrets
         nonce = secrets.randbelow(2**(4*16))
         key = secrets.token_bytes(16)
         AES_CTR.__init__(self, key, nonce)
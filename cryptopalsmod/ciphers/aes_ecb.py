@@ -1,11 +1,10 @@
-from Crypto.Cipher import AES 
 import cryptopalsmod.bytestringops as bso
-import secrets
 
 
 class AES_ECB:
     """Class which implements AES_ECB after being given a key"""
     def __init__(self, key):
+        from Crypto.Cipher import AES
         self.cipher = AES.new(key, AES.MODE_ECB)
 
     def encrypt(self, plaintext):
@@ -19,5 +18,6 @@ class AES_ECB_random(AES_ECB):
     """Class which implements AES_ECB but with a random key. Useful as 
     simulating an oracle"""
     def __init__(self):
+        import secrets
         AES_ECB.__init__(self, secrets.token_bytes(16))
 
@@ -1,6 +1,7 @@
 from hashlib import sha256
 import secrets
 from cryptopalsmod import number_theory as nt
+from cryptopalsmod import bytestringops as bso
 
 class DSAUser(object):
 
@@ -43,7 +44,7 @@ class DSAUser(object):
  
             k_inv = nt.invmod(k, self.q)
  
-            msg_hash = int(self.hash(message).hexdigest(), 16)
+            msg_hash = bso.bytes_to_int(self.hash(message).digest())
             s = (k_inv * (msg_hash + self.secret_key * r)) % self.q
         
         return self.public_key, r, s
@@ -56,11 +57,11 @@ class DSAUser(object):
         
         s_inv = nt.invmod(s, self.q)
         
-        msg_hash = int(self.hash(message).hexdigest(), 16)
+        msg_hash = bso.bytes_to_int(self.hash(message).digest())
         exp1 = msg_hash * s_inv % self.q
         
         exp2 = r * s_inv % self.q
         
-        v = ((nt.modexp(self.g, exp1, self.p) * nt.modexp(public_key, exp2, self.p)) % self.p) % self.q
+        v = nt.multi_exp([(self.g, exp1), (public_key, exp2)], self.p) % self.q
 
         return v == r
\ No newline at end of file
@@ -25,16 +25,15 @@ class FakeDSASignatory(rsa.RSAServer):
         """Formats a message for signing"""
  
         #hash the message and add the correct ans1 rep fro sha256
-        message_hash = sha256(message).hexdigest()
+        message_hash = sha256(message).digest()
 
         #Add the coorect padding until the signature block is 128 bytes long
 
-        sig_block = '00' + SHA256_asn1 + message_hash
-        while len(sig_block)/2 < 128 - 2:
-            sig_block = 'FF' + sig_block
-        sig_block = '0001' + sig_block
+        sig_block = b'\x00' + bso.hex_to_bytes(SHA256_asn1) + message_hash
+        sig_block = b'\xff'*(128 - 2 - len(sig_block)) + sig_block
+        sig_block = b'\x00\x01' + sig_block
 
-        return int(sig_block, 16)
+        return bso.bytes_to_int(sig_block)
 
 class FakeDSAVerify(rsa.RSAClient):
     def bad_verify_message(self, message, signature):
@@ -53,7 +52,7 @@ class FakeDSAVerify(rsa.RSAClient):
         message_hash = sha256(message).hexdigest()
         signature = rsa.RSAClient.encrypt(self, signature)
 
-        signature = bso.bytes_to_hex(signature.to_bytes(128, 'big'))
+        signature = bso.bytes_to_hex(bso.int_to_bytes(signature, 128))
         invalid_signature = Exception('Signiture is invalid')
         
         if signature[:6] != '0001ff':
@@ -7,18 +7,25 @@ class MTCipher(object):
         self.seed = seed
 
     def encrypt(self, plaintext):
-        keystream = b''
+        output = bytearray(plaintext)
+        self.encrypt_into(output)
 
-        while len(keystream) < len(plaintext):
-            new_num = self.prng.extract_number()
+        return bytes(output)
+
+    def encrypt_into(self, buffer):
+        """Encrypts a writable buffer (eg bytearray, memoryview or mmap) in 
+        place"""
+        view = memoryview(buffer).cast('B')
+
+        for start in range(0, len(view), bso.XOR_CHUNK_SIZE):
+            end = min(start + bso.XOR_CHUNK_SIZE, len(view))
 
             #The key stream is a sequence of bytes. There are a few ways to
             # extract a byte from a 32 bit number. We have chosen to jsut take
             # the lowest 8 bits 
-            new_num = ((1 << 8) - 1) & new_num
-            keystream += bytes([new_num])
-        
-        return bso.zipXOR(plaintext, keystream)
+            keystream = bytes([((1 << 8) - 1) & self.prng.extract_number() for _ in range(start, end)])
+
+            bso.xor_into(view, keystream, start)
 
     def reset_stream(self):
         self.prng = MT19937(self.seed)
@@ -1,10 +1,9 @@
-from Crypto.Util import number
 from cryptopalsmod import number_theory as nt
 
 class RSAServer():
 
     def __init__(self, e = 3, prime_size = 1024):
-
+        from Crypto.Util import number
 
         p = number.getPrime(prime_size)
         q = number.getPrime(prime_size)
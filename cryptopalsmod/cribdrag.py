@@ -0,0 +1,488 @@
+"""Crib dragging for ciphertexts which share a keystream, eg fixed nonce CTR
+(challenges 19 and 20) or a reused MT19937 keystream.
+
+XORing two such ciphertexts cancels the keystream and leaves the XOR of the
+two plaintexts. XORing a guessed word (the crib) into that at some offset
+reveals the other plaintext at that offset if the guess was right.
+
+The XORs of the pairs also say which bytes each plaintext can hold at each
+position: those which reveal text in every other plaintext. A whole
+dictionary, held in an Aho-Corasick automaton, is dragged at once by walking
+its trie along each ciphertext following only those bytes. Revealed text is
+scored by the dictionary words in it which stand on their own between
+separators, as fragments of words are found almost anywhere.
+"""
+
+import array
+import os
+
+import cryptopalsmod.bytestringops as bso
+
+
+class AhoCorasick(object):
+    """An Aho-Corasick automaton which finds every occurrence of every word of
+    a dictionary in a text in one pass over the text.
+
+    The trie is stored in flat arrays with nodes numbered in breadth first
+    order. Sorting the words makes the children of each node consecutive, so
+    the edges out of node n are first[n]..first[n + 1] - 1 and edge e leads
+    to node e + 1 with label labels[e]. This keeps a million node dictionary
+    such as words_alpha.txt compact and quick to save and load.
+    """
+
+    def __init__(self, first, labels, depth, is_word, fail, word_link):
+        self.first = first
+        self.labels = labels
+        self.depth = depth
+        self.is_word = is_word
+        self.fail = fail
+        self.word_link = word_link
+
+    @classmethod
+    def build(cls, words, min_length = 1):
+        """Builds the automaton for a list of words
+
+        Args:
+            words (iterable<bytes>): the dictionary. Words are lower cased
+            min_length = 1 (int): shorter words are left out
+
+        returns:
+            AhoCorasick
+        """
+        words = sorted(set(word.lower() for word in words if len(word) >= min_length))
+
+        #Build the trie a level at a time. Each level is the sorted list of
+        #distinct prefixes of that length
+        level = [b'']
+        parent_ids = {b'': 0}
+        children = array.array('i', [0])
+        labels = bytearray()
+        depth = bytearray([0])
+        is_word = bytearray([0])
+        word_set = set(words)
+
+        length = 0
+        while level:
+            length += 1
+            next_level = sorted(set(word[:length] for word in words if len(word) >= length))
+
+            next_ids = {}
+            for prefix in next_level:
+                children[parent_ids[prefix[:-1]]] += 1
+                next_ids[prefix] = len(depth)
+                children.append(0)
+                labels.append(prefix[-1])
+                depth.append(length)
+                is_word.append(prefix in word_set)
+
+            level = next_level
+            parent_ids = next_ids
+
+        #first[n] is the index of the first edge out of node n
+        first = array.array('i', [0])
+        for count in children:
+            first.append(first[-1] + count)
+
+        automaton = cls(first, bytes(labels), bytes(depth), bytes(is_word),
+                        array.array('i', [0])*len(depth), array.array('i', [0])*len(depth))
+        automaton._link()
+
+        return automaton
+
+    def _goto(self, node, byte):
+        """Returns the child of node along byte, or -1"""
+        edge = self.labels.find(byte, self.first[node], self.first[node + 1])
+
+        return edge + 1 if edge >= 0 else -1
+
+    def _link(self):
+        """Computes the failure links (the longest proper suffix which is
+        also in the trie) and word links (the longest such suffix which is a
+        word) of every node. Nodes are in breadth first order, so the links
+        of a node's parent and of shorter suffixes are already known."""
+        fail = self.fail
+        word_link = self.word_link
+
+        for node in range(0, len(self.depth)):
+            for edge in range(self.first[node], self.first[node + 1]):
+                child = edge + 1
+                byte = self.labels[edge]
+
+                if node != 0:
+                    suffix = fail[node]
+                    while True:
+                        target = self._goto(suffix, byte)
+                        if target >= 0:
+                            fail[child] = target
+                            break
+                        if suffix == 0:
+                            break
+                        suffix = fail[suffix]
+
+                target = fail[child]
+                word_link[child] = target if self.is_word[target] else word_link[target]
+
+    def search(self, text):
+        """Finds every dictionary word in text (case insensitive)
+
+        Args:
+            text (bytes): the text to search
+
+        yields:
+            tuple: (start, length) of each match, in order of end position
+        """
+        first = self.first
+        labels = self.labels
+        fail = self.fail
+        node = 0
+
+        for position, byte in enumerate(text.lower()):
+            while True:
+                edge = labels.find(byte, first[node], first[node + 1])
+                if edge >= 0:
+                    node = edge + 1
+                    break
+                if node == 0:
+                    break
+                node = fail[node]
+
+            match = node if self.is_word[node] else self.word_link[node]
+            while match:
+                yield position + 1 - self.depth[match], self.depth[match]
+                match = self.word_link[match]
+
+    def whole_words(self, text):
+        """Finds the dictionary words in text which are whole words, ie have a
+        non letter or the end of text on either side
+
+        Args:
+            text (bytes): the text to search
+
+        yields:
+            tuple: (start, length) of each whole word, in order of end position
+        """
+        for start, length in self.search(text):
+            end = start + length
+            if ((start == 0 or text[start - 1] not in _LETTERS)
+                    and (end == len(text) or text[end] not in _LETTERS)):
+                yield start, length
+
+    def save(self, filename):
+        """Saves the automaton as raw arrays: a header of (_FILE_MAGIC, number
+        of nodes), then first, labels, depth, is_word, fail and word_link"""
+        with open(filename, 'wb') as file:
+            array.array('i', [_FILE_MAGIC, len(self.depth)]).tofile(file)
+            self.first.tofile(file)
+            for data in (self.labels, self.depth, self.is_word):
+                array.array('B', data).tofile(file)
+            self.fail.tofile(file)
+            self.word_link.tofile(file)
+
+    @classmethod
+    def load(cls, filename):
+        """Loads an automaton written by save. Raises ValueError if the file is
+        not one, and EOFError if it is truncated"""
+        with open(filename, 'rb') as file:
+            header = array.array('i')
+            header.fromfile(file, 2)
+            magic, nodes = header
+            #Check the size before reading so a bad header can't ask for
+            #gigabytes
+            itemsize = header.itemsize
+            size = 2*itemsize + (nodes + 1)*itemsize + 3*nodes - 1 + 2*nodes*itemsize
+            if magic != _FILE_MAGIC or nodes < 1 or os.fstat(file.fileno()).st_size != size:
+                raise ValueError(filename + ' is not a saved AhoCorasick')
+
+            arrays = []
+            for typecode, length in (('i', nodes + 1), ('B', nodes - 1), ('B', nodes),
+                                     ('B', nodes), ('i', nodes), ('i', nodes)):
+                data = array.array(typecode)
+                data.fromfile(file, length)
+                arrays.append(data if typecode == 'i' else data.tobytes())
+
+        return cls(*arrays)
+
+    @classmethod
+    def from_word_list(cls, filename = 'words_alpha.txt', min_length = 3, cache_filename = None):
+        """Builds the automaton for a file with one word per line. Building
+        words_alpha.txt takes a while, so the automaton is cached in
+        cache_filename and loaded from there while it is newer than the
+        word list.
+
+        Args:
+            filename = 'words_alpha.txt' (str): path to the word list
+            min_length = 3 (int): shorter words are left out, as one and two
+                letter words match almost anywhere
+            cache_filename = None (str): where to cache the automaton. If None,
+                filename + '.AhoCorasick' + str(min_length) + '.model'
+
+        returns:
+            AhoCorasick
+        """
+        if cache_filename is None:
+            cache_filename = filename + '.AhoCorasick' + str(min_length) + '.model'
+
+        if (os.path.exists(cache_filename)
+                and os.path.getmtime(cache_filename) >= os.path.getmtime(filename)):
+            try:
+                return cls.load(cache_filename)
+            except (EOFError, ValueError):
+                #Truncated or old cache, rebuild
+                pass
+
+        with open(filename, 'rb') as file:
+            automaton = cls.build(file.read().split(), min_length)
+        automaton.save(cache_filename)
+
+        return automaton
+
+
+#First int of a saved automaton
+_FILE_MAGIC = 0x41686f43
+
+_LETTERS = bytes(range(ord('a'), ord('z') + 1)) + bytes(range(ord('A'), ord('Z') + 1))
+#Bytes which can separate words
+_SEPARATORS = b' ,.;:!?\'"-\t\n\r'
+#Bytes which can appear in a plaintext
+_TEXT = _LETTERS + b'0123456789' + _SEPARATORS
+
+_SEPARATOR_MASK = sum(1 << byte for byte in _SEPARATORS)
+#_TEXT_MASKS[x] has bit b set if b ^ x is in _TEXT. If x is the XOR of two
+#plaintexts at some position, these are the bytes the first can hold there
+#for the second to be text
+_TEXT_MASKS = [sum(1 << (byte ^ x) for byte in _TEXT) for x in range(256)]
+
+
+class CribDragger(object):
+    """Drags cribs over every pair of a list of ciphertexts which were
+    encrypted with the same keystream. The XOR of each pair is computed once
+    when the dragger is made.
+
+    Args:
+        ciphertexts (list<bytes>): ciphertexts sharing a keystream
+        automaton = None (AhoCorasick): dictionary used to check revealed
+            text. If None, AhoCorasick.from_word_list() is used
+    """
+
+    def __init__(self, ciphertexts, automaton = None):
+        if automaton is None:
+            automaton = AhoCorasick.from_word_list()
+
+        self.ciphertexts = list(ciphertexts)
+        self.automaton = automaton
+
+        #xors[(i, j)] is the XOR of ciphertexts i and j over their common
+        #length, which is the XOR of their plaintexts
+        self.xors = {}
+        for i, ciphertext1 in enumerate(self.ciphertexts):
+            for j in range(i + 1, len(self.ciphertexts)):
+                ciphertext2 = self.ciphertexts[j]
+                length = min(len(ciphertext1), len(ciphertext2))
+                self.xors[(i, j)] = bso.FixedXOR(ciphertext1[:length], ciphertext2[:length])
+
+    def _count(self, text, cut = False):
+        """Counts the bytes of text which are separators or part of a whole
+        dictionary word. Words count if they are lower case, capitalised or
+        upper case. Separators other than space must follow a letter and be
+        followed by a space or the end, or join two letters as in don't.
+
+        Args:
+            text (bytes): text made of _TEXT bytes
+            cut = False (bool): if True, text was cut out of a longer text, so
+                letter runs at either end which aren't words may be the ends
+                of longer words and are left out
+
+        returns:
+            tuple: (bytes which count (int), bytes scored (int))
+        """
+        covered = bytearray(len(text))
+        for start, length in self.automaton.whole_words(text):
+            word = text[start: start + length]
+            if word[1:].islower() or word.isupper():
+                covered[start: start + length] = b'\x01'*length
+
+        for position, byte in enumerate(text):
+            if byte == 32:
+                covered[position] = 1
+            elif byte in _SEPARATORS and position:
+                before = text[position - 1: position]
+                after = text[position + 1: position + 2] or b' '
+                if before in _LETTERS and (after == b' ' or after in _LETTERS):
+                    covered[position] = 1
+
+        scored = len(text)
+        if cut:
+            for run in (range(len(text)), range(len(text) - 1, -1, -1)):
+                for position in run:
+                    if covered[position] or text[position] not in _LETTERS:
+                        break
+                    covered[position] = 2
+                    scored -= 1
+
+        return covered.count(1), scored
+
+    def score(self, text):
+        """Scores revealed text by the fraction of its bytes which are
+        separators or part of a whole dictionary word, so b'mugte', which
+        only contains the word mug, scores 0
+
+        Args:
+            text (bytes): the text to score
+
+        returns:
+            float: score from 0 to 1, 0 if text is empty or has non text bytes
+        """
+        if not text or text.translate(None, _TEXT):
+            return 0.0
+
+        count, scored = self._count(text)
+
+        return count/scored
+
+    def drag(self, crib, min_score = 0.5):
+        """Tries crib at every offset of every pair of ciphertexts. If crib is
+        in one plaintext at an offset, the other plaintext is revealed there.
+        Revealed text is scored with score.
+
+        Args:
+            crib (bytes): text guessed to be in one of the plaintexts, eg b' the '
+            min_score = 0.5 (float): results scoring less are dropped
+
+        returns:
+            list<dict>: results, best first, as dicts of ('pair':(tuple) indices
+            of the ciphertexts, 'offset':(int), 'revealed':(bytes) text in one
+            plaintext if crib is in the other, 'score':(float))
+        """
+        results = []
+
+        for pair, xor in self.xors.items():
+            for offset in range(0, len(xor) - len(crib) + 1):
+                revealed = bso.FixedXOR(xor[offset: offset + len(crib)], crib)
+                score = self.score(revealed)
+                if score >= min_score:
+                    results.append({'pair':pair, 'offset':offset, 'revealed':revealed, 'score':score})
+
+        return sorted(results, key=lambda result: result['score'], reverse=True)
+
+    def allowed_bytes(self, index):
+        """Works out which bytes plaintext index can hold at each position:
+        those which reveal text in every other plaintext long enough to reach
+        it
+
+        Args:
+            index (int): the ciphertext
+
+        returns:
+            list<int>: a bitmask for each position of ciphertext index, with bit
+            b set if b is allowed there. 0 where no other ciphertext is that
+            long, as a guess can't be checked there
+        """
+        length = len(self.ciphertexts[index])
+        allowed = [(1 << 256) - 1]*length
+        checked = [False]*length
+
+        for pair, xor in self.xors.items():
+            if index not in pair:
+                continue
+            for position, byte in enumerate(xor):
+                allowed[position] &= _TEXT_MASKS[byte]
+                checked[position] = True
+
+        return [mask if checked[position] else 0 for position, mask in enumerate(allowed)]
+
+    def drag_dictionary(self, min_length = 4, min_score = 0.9):
+        """Drags every word of the dictionary over every offset of every
+        ciphertext at once, in one pass along each ciphertext.
+
+        A word can only be at an offset if each of its bytes, in either case,
+        is allowed there by allowed_bytes. So the trie is walked along the
+        ciphertext following only allowed bytes, with a walk starting at every
+        position where a separator is allowed just before. A word is reported
+        where a separator or the end of the plaintext is allowed just after
+        it. It is scored like score over the text it reveals in all the other
+        plaintexts together, leaving out words cut by the ends of the crib.
+        The more ciphertexts there are, the fewer bytes each position allows,
+        so the walks stay few.
+
+        Args:
+            min_length = 4 (int): shorter words are not reported, as they fit
+                in too many places
+            min_score = 0.9 (float): results scoring less are dropped
+
+        returns:
+            list<dict>: results, best first then longest first, as dicts of
+            ('index':(int) ciphertext whose plaintext holds the word,
+            'offset':(int), 'crib':(bytes) the word as it would appear there,
+            'score':(float))
+        """
+        first = self.automaton.first
+        labels = self.automaton.labels
+        depth = self.automaton.depth
+        is_word = self.automaton.is_word
+        results = []
+
+        for index in range(len(self.ciphertexts)):
+            allowed = self.allowed_bytes(index)
+
+            #active holds the trie node reached by each walk ending at the
+            #current position and the bytes the walk followed
+            active = []
+            for position, mask in enumerate(allowed):
+                if position == 0 or allowed[position - 1] & _SEPARATOR_MASK:
+                    active.append((0, b''))
+
+                next_active = []
+                for node, crib in active:
+                    for edge in range(first[node], first[node + 1]):
+                        byte = labels[edge]
+                        if mask >> byte & 1:
+                            next_active.append((edge + 1, crib + bytes([byte])))
+                        #Also try the upper case letter
+                        if byte in _LETTERS and mask >> (byte ^ 0x20) & 1:
+                            next_active.append((edge + 1, crib + bytes([byte ^ 0x20])))
+                active = next_active
+
+                after = position + 1
+                if after < len(allowed) and not allowed[after] & _SEPARATOR_MASK:
+                    continue
+                for node, crib in active:
+                    if not is_word[node] or depth[node] < min_length:
+                        continue
+
+                    offset = after - depth[node]
+                    _, decryptions = self.reveal(index, offset, crib)
+                    count = scored = 0
+                    for other, decryption in enumerate(decryptions):
+                        if other != index:
+                            counts = self._count(decryption, cut = True)
+                            count += counts[0]
+                            scored += counts[1]
+                    score = count/scored if scored else 0.0
+                    if score >= min_score:
+                        results.append({'index':index, 'offset':offset, 'crib':crib, 'score':score})
+
+        return sorted(results, key=lambda result: (result['score'], len(result['crib'])), reverse=True)
+
+    def reveal(self, index, offset, crib):
+        """Assumes crib is the plaintext of ciphertext index at offset and
+        decrypts every ciphertext there with the keystream this implies
+
+        Args:
+            index (int): ciphertext containing crib
+            offset (int): position of crib
+            crib (bytes): the known plaintext
+
+        returns:
+            tuple: (keystream at offset (bytes), decryptions (list<bytes>) of
+            every ciphertext at offset, shorter where a ciphertext ends)
+        """
+        ciphertext = self.ciphertexts[index]
+        assert offset + len(crib) <= len(ciphertext)
+
+        keystream = bso.FixedXOR(ciphertext[offset: offset + len(crib)], crib)
+        decryptions = []
+        for other in self.ciphertexts:
+            segment = other[offset: offset + len(crib)]
+            decryptions.append(bso.FixedXOR(segment, keystream[:len(segment)]))
+
+        return keystream, decryptions
@@ -1,4 +1,6 @@
 from cryptopalsmod import number_theory as nt
+from cryptopalsmod import bytestringops as bso
+import itertools
 
 
 class DSAattacks():
@@ -28,7 +30,7 @@ class DSAattacks():
     def secret_key_from_nonce(self, message, nonce, r, s):
         """
         Given a signature, nonce and message, calculates the secret key"""
-        numerator = (s*nonce - int(self.hash(message).hexdigest(), 16)) % self.q
+        numerator = (s*nonce - bso.bytes_to_int(self.hash(message).digest())) % self.q
         
         r_inv = nt.invmod(r, self.q)
         
@@ -55,9 +57,9 @@ class DSAattacks():
     def test_nonce(self, nonce, message, r, s):
         """Tests is a nonce gives the desired signature for a message"""
 
-        message_int = int(self.hash(message).hexdigest(), 16)
+        message_int = bso.bytes_to_int(self.hash(message).digest())
 
-        test_r = nt.modexp(self.g, nonce, self.p) % self.q
+        test_r = nt.fixed_base(self.g, self.p).pow_fixed(nonce) % self.q
 
             #Don't test s if r does not match
             
@@ -95,11 +97,46 @@ class DSAattacks():
     def nonce_from_double_signing(self, message1, s1, message2, s2):
         """Computes the nonce from two message signed with the same nonce"""
 
-        msg_hash1 = int(self.hash(message1).hexdigest(), 16) 
-        msg_hash2 = int(self.hash(message2).hexdigest(), 16)
+        msg_hash1 = bso.bytes_to_int(self.hash(message1).digest()) 
+        msg_hash2 = bso.bytes_to_int(self.hash(message2).digest())
 
         numerator = (msg_hash1 - msg_hash2) % self.q
 
         denominator = nt.invmod((s1 - s2) % self.q, self.q)
 
-        return (numerator * denominator) % self.q 
\ No newline at end of file
+        return (numerator * denominator) % self.q 
+
+    def key_from_repeated_nonce(self, msg_dicts):
+        """Looks for a pair of messages signed with the same nonce among many
+        signed messages and returns the secret key. A repeated nonce gives a
+        repeated r, so only pairs with the same r are tried, and the
+        denominators of all their nonces are inverted together with
+        nt.batch_invmod.
+
+        Args:
+            msg_dicts (list<dict>): see key_from_double_signing
+
+        returns:
+            int: secret key used for signing, or 0 if not found
+        """
+        #Group the messages by r so only messages which share it are paired
+        groups = {}
+        for msg_dict in msg_dicts:
+            groups.setdefault(msg_dict['r'], []).append(msg_dict)
+
+        pairs = [(msg_dict1, msg_dict2) for group in groups.values() if len(group) > 1
+                 for msg_dict1, msg_dict2 in itertools.combinations(group, 2)
+                 if (msg_dict1['s'] - msg_dict2['s']) % self.q]
+
+        denominators = nt.batch_invmod([msg_dict1['s'] - msg_dict2['s'] for msg_dict1, msg_dict2 in pairs], self.q)
+
+        for (msg_dict1, msg_dict2), denominator in zip(pairs, denominators):
+            msg_hash1 = bso.bytes_to_int(self.hash(msg_dict1['msg']).digest())
+            msg_hash2 = bso.bytes_to_int(self.hash(msg_dict2['msg']).digest())
+            nonce = (msg_hash1 - msg_hash2) * denominator % self.q
+
+            secret_key = self.test_nonce(nonce, msg_dict1['msg'], msg_dict1['r'], msg_dict1['s'])
+            if secret_key > 0:
+                return secret_key
+
+        return 0
@@ -0,0 +1,122 @@
+"""A collection of functions which are used for loading hex and base64 encoded
+data files when solving the cryptopals challenges. Files are read in fixed
+size chunks so memory use does not depend on the size of the file."""
+
+import binascii
+import mmap
+
+#Number of bytes read from a file at a time
+CHUNK_SIZE = 2**20
+
+#Number of encoded characters that decode to a whole number of bytes
+_QUANTUM = {'hex': 2, 'base64': 4}
+
+_WHITESPACE = b' \t\r\n\x0b\x0c'
+
+def _decoder(encoding):
+    """Returns the function which decodes a bytes object of encoded characters
+
+    Args:
+        encoding (str): 'hex' or 'base64'
+
+    returns:
+        function
+
+    raises:
+        Exception('Unknown encoding') if encoding is not 'hex' or 'base64'
+    """
+    if encoding == 'hex':
+        return binascii.a2b_hex
+    if encoding == 'base64':
+        return binascii.a2b_base64
+
+    raise Exception('Unknown encoding: ' + str(encoding))
+
+def iter_records(filename, encoding):
+    """Yields each line of a file, decoded, one line at a time. Empty lines are
+    skipped. Useful for files with one ciphertext per line, eg 4.txt and 8.txt
+
+    Args:
+        filename (str): path to the file
+        encoding (str): 'hex' or 'base64'
+
+    yields:
+        bytes: the decoded line
+    """
+    decode = _decoder(encoding)
+
+    with open(filename, 'rb') as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                yield decode(line)
+
+def iter_decoded_chunks(filename, encoding, chunk_size = CHUNK_SIZE):
+    """Treats a whole file as one encoded message (whitespace and line breaks
+    are ignored) and yields the decoded message in chunks. Useful for files
+    such as 6.txt and 7.txt where one ciphertext is split over many lines.
+
+    Args:
+        filename (str): path to the file
+        encoding (str): 'hex' or 'base64'
+        chunk_size (int) = CHUNK_SIZE: number of bytes to read at a time
+
+    yields:
+        bytes: the next chunk of the decoded message
+    """
+    decode = _decoder(encoding)
+    quantum = _QUANTUM[encoding]
+
+    #Encoded characters which do not yet decode to a whole number of bytes
+    leftover = b''
+
+    with open(filename, 'rb') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+
+            chunk = leftover + chunk.translate(None, _WHITESPACE)
+            ready = len(chunk) - len(chunk) % quantum
+            leftover = chunk[ready:]
+
+            if ready:
+                yield decode(chunk[:ready])
+
+    #Let the decoder complain about a truncated file
+    if leftover:
+        yield decode(leftover)
+
+def load_decoded(filename, encoding, output_filename = None, chunk_size = CHUNK_SIZE):
+    """Decodes a whole file as one message (see iter_decoded_chunks) into a
+    single contiguous buffer. If output_filename is set, the decoded bytes are
+    written to that file as they are produced and the result is a read only
+    memory map of it, so the message never has to fit in memory.
+
+    Args:
+        filename (str): path to the file
+        encoding (str): 'hex' or 'base64'
+        output_filename (str) = None: file to write the decoded message to
+        chunk_size (int) = CHUNK_SIZE: number of bytes to read at a time
+
+    returns:
+        bytearray: the decoded message, or mmap.mmap if output_filename is set
+    """
+    chunks = iter_decoded_chunks(filename, encoding, chunk_size)
+
+    if output_filename is None:
+        output = bytearray()
+        for chunk in chunks:
+            output += chunk
+        return output
+
+    with open(output_filename, 'wb+') as file:
+        for chunk in chunks:
+            file.write(chunk)
+        file.flush()
+
+        #An empty file can not be memory mapped
+        if file.tell() == 0:
+            return bytearray()
+
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
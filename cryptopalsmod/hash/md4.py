@@ -1,4 +1,5 @@
 from cryptopalsmod.hash import sha1
+import cryptopalsmod.bytestringops as bso
 import struct
 
 class MD4(object):
@@ -43,8 +44,7 @@ class MD4(object):
 
         #pads the message according to speifications. Brak into 64 bit chunks
         #for individual processing
-        message += self.padding(message_length)
-        chunks = [message[i:i + 64] for i in range(0, len(message), 64)]
+        chunks = bso.BlockView(message, 64, self.padding(message_length))
         
         for chunk in chunks:
             self.process(chunk)
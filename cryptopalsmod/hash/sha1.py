@@ -1,4 +1,4 @@
-import hashlib
+import cryptopalsmod.bytestringops as bso
 import struct
 
 def left_rotate(x, n, w):
@@ -33,8 +33,7 @@ class SHA1(object):
         if message_length == None:
             message_length = len(message)
 
-        message += self.padding(message_length)
-        chunks = [message[i:i + 64] for i in range(0, len(message), 64)]
+        chunks = bso.BlockView(message, 64, self.padding(message_length))
         for chunk in chunks:
             self.process(chunk)
 
@@ -102,7 +101,8 @@ class SHA1(object):
         return self.digest().hex()
 
 def main():
-    
+    import hashlib
+
     assert SHA1(b'abc').hexdigest() == hashlib.sha1(b'abc').hexdigest()
 
 if __name__ == '__main__':
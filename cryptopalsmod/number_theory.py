@@ -1,17 +1,38 @@
 """A collection of functions related to number thoery"""
 
+import math
+import sys
+
 #A nice prime for Diffie Hellman that NIST likes
 NIST_PRIME = 0xffffffffffffffffc90fdaa22168c234c4c6628b80dc1cd129024e088a67cc74020bbea63b139b22514a08798e3404ddef9519b3cd3a431b302b0a6df25f14374fe1356d6d51c245e485b576625e7ec6f44c42e9a637ed6b0bff5cb6f406b7edee386bfb5a899fa5ae9f24117c4b1fe649286651ece45b3dc2007cb8a163bf0598da48361c55d39a69163fa8fd24cf5f83655d23dca3ad961c62f356208552bb9ed529077096966d670c354e4abc9804f1746c08ca237327ffffffffffffffff
 
-def modexp( base, exponent, p ):
-   """computes  (base ^ exponent) mod p
-   Arg:
-      base (int)
-      exponent (int)
-      p (int)
-   returns:
-      int
+#The core integer operations are done by a backend: gmpy2 if it is
+#installed, otherwise Python's builtin pow and math.isqrt. The 'python'
+#backend is the original hand written loops, kept for reference and
+#benchmarks/number_theory_bench.py.
+
+class Backend(object):
+   """The integer operations of a backend. A plain class rather than a
+   collections.namedtuple so that importing this module stays cheap
+
+   Args:
+      name (str)
+      powmod (function): (base, exponent, p) -> (base ^ exponent) mod p
+      invert (function): (a, p) -> inverse of a mod p
+      gcdext (function): (a, b) -> (s, t, gcd) with s*a + t*b == gcd
+      gcd (function): (a, b) -> gcd
+      iroot (function): (k, N) -> integer k-th root of N
    """
+
+   def __init__(self, name, powmod, invert, gcdext, gcd, iroot):
+      self.name = name
+      self.powmod = powmod
+      self.invert = invert
+      self.gcdext = gcdext
+      self.gcd = gcd
+      self.iroot = iroot
+
+def _python_powmod(base, exponent, p):
    result = 1
 
    while exponent != 0:
@@ -20,29 +41,310 @@ def modexp( base, exponent, p ):
          result = (result * base) % p
       
       exponent >>= 1
-      base = (base * base) % p;
+      base = (base * base) % p
    
    return result
 
+def _python_gcdext(a, b):
+   #Based on wikipedia pseudocode
+   s, t, r = 0, 1, b
+   olds, oldt, oldr = 1, 0, a
+
+   while r > 0:
+      quotient = oldr//r
+      oldr, r = r, oldr - quotient * r
+      olds, s = s, olds - quotient * s
+      oldt , t = t, oldt - quotient * t
+
+   return olds, oldt, oldr
+
+def _python_invert(a, p):
+   a, _, gcd = _python_gcdext(a, p)
+
+   if gcd > 1:
+      raise ValueError('not invertible')
+   return a % p
+
+def _python_gcd(a, b):
+   _, _, g = _python_gcdext(a, b)
+   return g
+
+def _python_iroot(k, N):
+   #Newtons method
+   u, s = N, N+1
+   while u < s:
+      s = u
+      t = (k-1) * s + N // pow(s, k-1)
+      u = t // k
+   return s
+
+def _builtin_invert(a, p):
+   return pow(a, -1, p)
+
+def _builtin_iroot(k, N):
+   #math.isqrt is new in python 3.8
+   if k == 2 and hasattr(math, 'isqrt'):
+      return math.isqrt(N)
+   if N < 2:
+      return N
+
+   #Newtons method, starting from a power of 2 just above the root rather
+   #than from N, so it takes a few steps rather than about log(N)
+   s = 1 << -(-N.bit_length()//k)
+   while True:
+      u = ((k-1) * s + N // pow(s, k-1)) // k
+      if u >= s:
+         return s
+      s = u
+
+def _python_backend():
+   return Backend('python', _python_powmod, _python_invert, _python_gcdext, _python_gcd, _python_iroot)
+
+def _builtin_backend():
+   #pow(a, -1, p) is new in python 3.8
+   invert = _builtin_invert if sys.version_info >= (3, 8) else _python_invert
+
+   return Backend('builtin', pow, invert, _python_gcdext, math.gcd, _builtin_iroot)
+
+def _gmpy2_backend():
+   import gmpy2
+
+   def gcdext(a, b):
+      g, s, t = gmpy2.gcdext(a, b)
+      return int(s), int(t), int(g)
+
+   return Backend('gmpy2',
+                  lambda base, exponent, p: int(gmpy2.powmod(base, exponent, p)),
+                  lambda a, p: int(gmpy2.invert(a, p)),
+                  gcdext,
+                  lambda a, b: int(gmpy2.gcd(a, b)),
+                  lambda k, N: int(gmpy2.iroot(N, k)[0]))
+
+_BACKEND_FACTORIES = {'python': _python_backend, 'builtin': _builtin_backend, 'gmpy2': _gmpy2_backend}
+
+#The backend in use, chosen on first use by set_backend
+_backend = None
+
+def available_backends():
+   """returns the names of the backends which can be used here
+
+   returns:
+      List<str>: names, fastest first
+   """
+   names = []
+   for name in ['gmpy2', 'builtin', 'python']:
+      try:
+         _BACKEND_FACTORIES[name]()
+      except ImportError:
+         continue
+      names.append(name)
+
+   return names
+
+def set_backend(name = None):
+   """Chooses the backend used by modexp, extended_euc, invmod, gcd and
+   newton_root (and everything built on them)
+
+   Args:
+      name (str) = None: 'gmpy2', 'builtin' or 'python'. If None, gmpy2 if
+         it is installed, otherwise builtin
+   returns:
+      Backend: the backend now in use
+   raises:
+      Exception('Unknown backend') if name is not one of the above
+      ImportError if name is 'gmpy2' and it is not installed
+   """
+   global _backend
+
+   if name is None:
+      try:
+         _backend = _gmpy2_backend()
+      except ImportError:
+         _backend = _builtin_backend()
+      return _backend
+
+   if name not in _BACKEND_FACTORIES:
+      raise Exception('Unknown backend: ' + str(name))
+
+   _backend = _BACKEND_FACTORIES[name]()
+   return _backend
+
+def get_backend():
+   """returns the Backend in use"""
+   return _backend or set_backend()
+
+def modexp( base, exponent, p ):
+   """computes  (base ^ exponent) mod p
+   Arg:
+      base (int)
+      exponent (int)
+      p (int)
+   returns:
+      int
+   """
+   return (_backend or set_backend()).powmod(base, exponent, p)
+
+class FixedBase(object):
+   """Precomputed powers of a fixed base for computing
+   (base ^ exponent) mod modulus for many exponents, eg 2 mod NIST_PRIME or
+   the DSA generator g mod p.
+
+   The exponent is split into window bit digits and the table holds
+   base ^ (digit * 2^(window*i)) for every digit value and position i, so an
+   exponentiation is one multiplication per nonzero digit and no squarings.
+   With the default window of 4 that is about a quarter of the bits of the
+   exponent, against about 1.5 multiplications per bit for modexp.
+
+   Args:
+      base (int)
+      modulus (int)
+      bits (int) = None: size of the exponents the table covers. If None,
+         modulus.bit_length(). Larger exponents still work but cost more
+      window (int) = 4: bits per digit. The table has 2^window entries per
+         digit
+   """
+
+   def __init__(self, base, modulus, bits = None, window = 4):
+      if bits is None:
+         bits = modulus.bit_length()
+
+      self.base = base
+      self.modulus = modulus
+      self.window = window
+      self.digits = -(-bits//window)
+
+      #table[i*2^window + d] = base ^ (d * 2^(window*i)) mod modulus
+      size = 1 << window
+      self.table = []
+      power = base % modulus
+      for _ in range(0, self.digits):
+         row = [1 % modulus, power]
+         for _ in range(2, size):
+            row.append(row[-1]*power % modulus)
+         self.table.extend(row)
+
+         power = row[-1]*power % modulus
+
+      #base ^ (2^(window*digits)), for the part of an exponent the table
+      #does not cover
+      self.top = power
+
+   def pow_fixed(self, exponent):
+      """computes (base ^ exponent) mod modulus
+      Arg:
+         exponent (int): non negative
+      returns:
+         int
+      """
+      assert exponent >= 0
+
+      table = self.table
+      modulus = self.modulus
+      mask = (1 << self.window) - 1
+
+      result = 1 % modulus
+      offset = 0
+      for _ in range(0, self.digits):
+         if not exponent:
+            return result
+
+         digit = exponent & mask
+         if digit:
+            result = result*table[offset + digit] % modulus
+
+         exponent >>= self.window
+         offset += mask + 1
+
+      if exponent:
+         result = result*modexp(self.top, exponent, modulus) % modulus
+
+      return result
+
+#The most recently used FixedBase tables, (base, modulus, bits, window) ->
+#FixedBase in order of use. A plain dict rather than functools.lru_cache, which
+#would make importing this module pull in collections
+_fixed_bases = {}
+FIXED_BASE_CACHE_SIZE = 32
+
+def fixed_base(base, modulus, bits = None, window = 4):
+   """returns a FixedBase for base and modulus. The tables take a while to
+   build, so the most recently used ones are cached
+
+   Args:
+      see FixedBase
+   returns:
+      FixedBase
+   """
+   key = (base, modulus, bits, window)
+
+   #Move a cached table to the end so the least recently used is first
+   table = _fixed_bases.pop(key, None)
+   if table is None:
+      table = FixedBase(base, modulus, bits, window)
+      if len(_fixed_bases) >= FIXED_BASE_CACHE_SIZE:
+         del _fixed_bases[next(iter(_fixed_bases))]
+   _fixed_bases[key] = table
+
+   return table
+
+def multi_exp(pairs, modulus, window = 4):
+   """computes the product of (base ^ exponent) mod modulus over a list of
+   (base, exponent) pairs, eg g^u1 * y^u2 mod p in DSA verification.
+
+   Uses Straus' method: the exponents are read a window of bits at a time
+   from the top together, so the squarings are shared by every base and
+   each base only adds one multiplication per nonzero window. For two
+   exponents of the same size this is about 40% fewer multiplications than
+   two separate calls to modexp.
+
+   Args:
+      pairs (List<tuple(int, int)>): (base, exponent) pairs. Exponents must
+         be non negative
+      modulus (int)
+      window (int) = 4: bits of each exponent read at a time
+   returns:
+      int
+   """
+   pairs = [(base % modulus, exponent) for base, exponent in pairs if exponent]
+   assert all(exponent > 0 for _, exponent in pairs)
+
+   result = 1 % modulus
+   if not pairs:
+      return result
+
+   #tables[i][d] = base_i ^ d mod modulus
+   size = 1 << window
+   tables = []
+   for base, _ in pairs:
+      table = [1 % modulus, base]
+      for _ in range(2, size):
+         table.append(table[-1]*base % modulus)
+      tables.append(table)
+
+   exponents = [exponent for _, exponent in pairs]
+   mask = size - 1
+   bits = max(exponents).bit_length()
+
+   for shift in range(window*((bits - 1)//window), -1, -window):
+      for _ in range(0, window):
+         result = result*result % modulus
+
+      for table, exponent in zip(tables, exponents):
+         digit = (exponent >> shift) & mask
+         if digit:
+            result = result*table[digit] % modulus
+
+   return result
+
 def extended_euc(a, b):
    """returns s, t and gcd(a,b) such that as + bt = gcd(ab)
-   Bases on wikipedia pseudocode
    Args:
       a (int)
       b (int)
    returns:
       int, int
    """
-   s, t, r = 0, 1, b
-   olds, oldt, oldr = 1, 0, a
-
-   while r > 0:
-      quotient = oldr//r
-      oldr, r = r, oldr - int(quotient * r)
-      olds, s = s, olds - int(quotient * s)
-      oldt , t = t, oldt - int(quotient * t)
-
-   return olds, oldt, oldr
+   return (_backend or set_backend()).gcdext(a, b)
 
 def invmod(a, p):
    """returns the inverse of a mod p if possible. Otherwise raises an exception
@@ -56,25 +358,86 @@ def invmod(a, p):
    raise:
       Exception('a is not invertible mod p')
    """
-   exception_message = str(a) +' is not invertible mod ' + str(p) 
-   a, _, gcd = extended_euc(a, p)
+   try:
+      return (_backend or set_backend()).invert(a, p)
+   except (ValueError, ZeroDivisionError):
+      raise Exception(str(a) +' is not invertible mod ' + str(p))
 
-   if gcd > 1:
-      raise Exception(exception_message)
-   return a % p
+def batch_invmod(values, p):
+   """returns the inverses of many values mod p using Montgomery's trick: the
+   product of all the values is inverted once and each inverse is recovered
+   from it with 3 multiplications
+
+   Args:
+      values (List<int>)
+      p (int)
+   returns:
+      List<int>: inverses[i]*values[i] % p == 1
+   raise:
+      Exception('a is not invertible mod p') for the first value which is
+      not invertible
+   """
+   values = [value % p for value in values]
+
+   #prefixes[i] is the product of values[:i]
+   prefixes = []
+   product = 1
+   for value in values:
+      prefixes.append(product)
+      product = product*value % p
+
+   try:
+      inverse = (_backend or set_backend()).invert(product, p)
+   except (ValueError, ZeroDivisionError):
+      for value in values:
+         if gcd(value, p) != 1:
+            raise Exception(str(value) +' is not invertible mod ' + str(p))
+      raise
+
+   #inverse is the inverse of the product of values[:i + 1]
+   inverses = [0]*len(values)
+   for i in range(len(values) - 1, -1, -1):
+      inverses[i] = inverse*prefixes[i] % p
+      inverse = inverse*values[i] % p
+
+   return inverses
 
 def gcd(a, b):
-   _, _, g = extended_euc(a,b)
-   return g
+   return (_backend or set_backend()).gcd(a, b)
+
+def product_tree(values):
+   """Builds the tree of products of values: level 0 is values and each
+   level is the products of pairs from the level below (an odd one out is
+   carried up), so the last level is [product of all values]
+
+   Args:
+      values (List<int>): not empty
+   returns:
+      List<List<int>>: the levels, from the leaves to the root
+   """
+   tree = [list(values)]
+   while len(tree[-1]) > 1:
+      level = tree[-1]
+      tree.append([level[i]*level[i + 1] if i + 1 < len(level) else level[i]
+                   for i in range(0, len(level), 2)])
+   return tree
 
-def chinese_remainder_theorem(congruences, moduli):
+def chinese_remainder_theorem(congruences, moduli, mixed_radix = False):
    """Solves x = c_i mod n_i where congruences = [c_0, c_1,...],
    moduli = [n_0, n_1,...] and x>0 is smaller than the product of all moduli.
    Assumes that all the moduli are coprime.
 
+   x is the sum of c_i * (N/n_i) * ((N/n_i)^-1 mod n_i) where N is the
+   product of the moduli. Rather than dividing N by each modulus, a product
+   tree of the moduli gives N/n_i mod n_i by reducing N down the tree, and
+   the sum is collected back up the tree, so many moduli are recombined in
+   quasi linear time.
+
    Args:
       congruences (List<int>)
       moduli (List<int>)
+      mixed_radix (bool) = False: if True, returns the mixed radix digits of
+         x instead, see garner
    returns:
       x (int)
    raises:
@@ -84,36 +447,78 @@ def chinese_remainder_theorem(congruences, moduli):
    """
    if len(moduli) != len(congruences):
       raise Exception('differing number of congruences and moduli')
+   if mixed_radix:
+      return garner(congruences, moduli, mixed_radix=True)
+   if not moduli:
+      return 0
 
-   #N is the product of all moduli
-   N = 1
-   for mod in moduli:
-      N = N*mod
+   tree = product_tree(moduli)
+   N = tree[-1][0]
 
-   #Construct the solution. Wikipedia (Vhinese remainder theorem) gives a good
-   #explanation
+   #Reduce N mod the square of each node, down the tree. At a leaf,
+   #(N mod n_i^2)//n_i == (N/n_i) mod n_i
+   remainders = [N]
+   for level in reversed(tree[:-1]):
+      remainders = [remainders[i//2] % (node*node) for i, node in enumerate(level)]
 
-   bez_coeffs = []
-   for mod in moduli:
-      a, _, g = extended_euc(N//mod, mod)
-      if g > 1:
+   #Each leaf's term of the sum, divided by N/n_i
+   terms = []
+   for cong, mod, remainder in zip(congruences, moduli, remainders):
+      try:
+         terms.append(cong*invmod(remainder//mod, mod) % mod)
+      except Exception:
          raise Exception('moduli are not coprime')
-      bez_coeffs.append(a)
 
-   x = 0
-   for cong, mod, bez in zip(congruences, moduli, bez_coeffs):
-      x += cong*N*bez//mod
+   #Collect the sum up the tree. A node's value is the sum of the terms
+   #below it, each multiplied by the product of the other moduli below it
+   for level in tree[:-1]:
+      terms = [terms[i]*level[i + 1] + terms[i + 1]*level[i] if i + 1 < len(level) else terms[i]
+               for i in range(0, len(level), 2)]
+
+   return terms[0] % N
 
-   return x % N
+def garner(congruences, moduli, mixed_radix = False):
+   """Solves the same problem as chinese_remainder_theorem using Garner's
+   algorithm, which finds the mixed radix digits v_i of x:
+   x = v_0 + v_1*n_0 + v_2*n_0*n_1 + ... with 0 <= v_i < n_i.
+   Only arithmetic mod each n_i is needed, which suits many small moduli,
+   eg the subgroups in Pohlig-Hellman. The work grows with the square of the
+   number of moduli.
+
+   Args:
+      congruences (List<int>)
+      moduli (List<int>)
+      mixed_radix (bool) = False: if True, returns the digits instead of x
+   returns:
+      int, or List<int> if mixed_radix
+   raises:
+      Exception('moduli are not coprime') if the moduli are not coprime
+   """
+   digits = []
+   for i, (cong, mod) in enumerate(zip(congruences, moduli)):
+      #x mod n_i from the digits so far, and n_0*...*n_(i-1) mod n_i
+      value = 0
+      radix = 1
+      for digit, previous in zip(digits, moduli):
+         value = (value + digit*radix) % mod
+         radix = radix*previous % mod
+
+      try:
+         digits.append((cong - value)*invmod(radix, mod) % mod)
+      except Exception:
+         raise Exception('moduli are not coprime')
+
+   if mixed_radix:
+      return digits
+
+   x = 0
+   for digit, mod in zip(reversed(digits), reversed(moduli)):
+      x = x*mod + digit
+   return x
 
 def newton_root(k, N):
-   """Return greatest integer x such that x**k <= N by using Newtons method."""
-   u, s = N, N+1
-   while u < s:
-      s = u
-      t = (k-1) * s + N // pow(s, k-1)
-      u = t // k
-   return s
+   """Return greatest integer x such that x**k <= N"""
+   return (_backend or set_backend()).iroot(k, N)
 
 
 def main():
@@ -126,6 +531,13 @@ def main():
    moduli = [3, 4 , 5]
 
    assert chinese_remainder_theorem(congruences, moduli) == 39
+   assert garner(congruences, moduli) == 39
+   assert chinese_remainder_theorem(congruences, moduli, mixed_radix=True) == [0, 1, 3]
+
+   assert fixed_base(3, 5).pow_fixed(3) == 2
+   assert fixed_base(2, NIST_PRIME).pow_fixed(12345) == modexp(2, 12345, NIST_PRIME)
+   assert multi_exp([(2, 10), (3, 5)], 1000) == 2**10 * 3**5 % 1000
+   assert batch_invmod([17, 7], 3120) == [2753, invmod(7, 3120)]
 
 if __name__ == "__main__":
    main()
\ No newline at end of file
@@ -0,0 +1,337 @@
+"""Models which score how much a bytes object looks like English plaintext.
+Used by the attacks in xorattacks to rank candidate keys.
+
+Every model is compiled once into a flat lookup table (a list indexed by byte
+value, or by 256*first + second for pairs of bytes) so scoring needs no chr()
+or dict lookups. A higher score always means more likely to be English.
+Models can be trained from any text corpus, eg words_alpha.txt, and the
+compiled table is cached to disk next to the corpus so later runs just load it.
+"""
+
+import math
+import os
+
+EnglishFreq = {'a': 0.0651738, 'b': 0.0124248, 'c': 0.0217339, 'd': 0.0349835, 'e': 0.1041442, 'f': 0.0197881, 'g': 0.0158610,
+    'h': 0.0492888, 'i': 0.0558094, 'j': 0.0009033, 'k': 0.0050529, 'l': 0.0331490, 'm': 0.0202124, 'n': 0.0564513,
+    'o': 0.0596302, 'p': 0.0137645, 'q': 0.0008606, 'r': 0.0497563, 's': 0.0515760, 't': 0.0729357, 'u': 0.0225134,
+    'v': 0.0082903, 'w': 0.0171272, 'x': 0.0013692, 'y': 0.0145984, 'z': 0.0007836, ' ': 0.1918182}
+#Frequencies of characters (lower case) in the english language
+
+#Maps upper case letters to lower case. Models treat both cases the same.
+_FOLD = bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ', b'abcdefghijklmnopqrstuvwxyz')
+
+#Added to every count when training so that bytes which never occur in the
+#corpus still have a (small) probability
+SMOOTHING = 0.5
+
+def _read_corpus(filename):
+    """Reads a training corpus. Line breaks are treated as spaces so that a
+    word list with one word per line trains like text."""
+    with open(filename, 'rb') as file:
+        return file.read().replace(b'\r\n', b' ').replace(b'\n', b' ')
+
+def _byte_probabilities(corpus):
+    """Returns a list of 256 smoothed probabilities of each byte (case
+    folded) in corpus"""
+    import collections
+
+    counts = collections.Counter(corpus.translate(_FOLD))
+    total = len(corpus) + 256*SMOOTHING
+
+    return [(counts[byte] + SMOOTHING)/total for byte in range(0, 256)]
+
+
+class ScoringModel(object):
+    """Base class of the scoring models. A model is a flat lookup table, see
+    the subclasses for what the table holds.
+
+    Subclasses implement score and may override key_scores with something
+    faster than decrypting under every key.
+    """
+
+    #Number of entries in the table
+    table_size = 256
+
+    def __init__(self, table):
+        assert len(table) == self.table_size
+        self.table = list(table)
+
+    def score(self, bytestring):
+        """Returns the score of bytestring, higher is more likely English"""
+        raise NotImplementedError
+
+    def key_scores(self, bytestring):
+        """Scores the decryption of bytestring under every single byte XOR key
+
+        Args:
+            bytestring (bytes): the bytes object to be scored
+
+        returns:
+            list<float>: scores[key] is the score of bytestring XORed with key
+        """
+        return [self.score(bytes(byte ^ key for byte in bytestring)) for key in range(0, 256)]
+
+    def histogram_key_scores(self, histogram):
+        """Like key_scores, but from the number of times each byte occurs
+        rather than the bytes themselves. Only models which score bytes
+        independently of their neighbours support this.
+
+        Args:
+            histogram (dict): byte value (int) -> count, eg a collections.Counter
+
+        returns:
+            list<float>: scores[key] is the score of the counted bytes XORed
+            with key
+
+        raises:
+            Exception('model can not score byte histograms')
+        """
+        raise Exception(type(self).__name__ + ' can not score byte histograms')
+
+    @classmethod
+    def train(cls, corpus):
+        """Builds a model from the text in corpus (bytes)"""
+        raise NotImplementedError
+
+    def save(self, filename):
+        """Writes the compiled table to filename"""
+        import array
+
+        with open(filename, 'wb') as file:
+            array.array('d', self.table).tofile(file)
+
+    @classmethod
+    def load(cls, filename):
+        """Reads a model written by save"""
+        import array
+
+        table = array.array('d')
+        with open(filename, 'rb') as file:
+            table.fromfile(file, cls.table_size)
+
+        return cls(table)
+
+    @classmethod
+    def from_corpus(cls, filename, cache_filename = None):
+        """Trains a model from the text file filename. The compiled model is
+        cached in cache_filename and loaded from there while it is newer than
+        the corpus.
+
+        Args:
+            filename (str): path to the corpus, eg 'words_alpha.txt'
+            cache_filename (str) = None: where to cache the model. If None,
+                filename + '.' + the class name + '.model'
+
+        returns:
+            ScoringModel: an instance of cls
+        """
+        if cache_filename is None:
+            cache_filename = filename + '.' + cls.__name__ + '.model'
+
+        if (os.path.exists(cache_filename)
+                and os.path.getmtime(cache_filename) >= os.path.getmtime(filename)):
+            try:
+                return cls.load(cache_filename)
+            except (EOFError, ValueError):
+                #Truncated cache, retrain
+                pass
+
+        model = cls.train(_read_corpus(filename))
+        model.save(cache_filename)
+
+        return model
+
+
+class UnigramModel(ScoringModel):
+    """Scores each byte independently: the score of a bytes object is the sum
+    of table[byte] over its bytes. Trained models use the log probability of
+    each byte, so the score is the log likelihood of the text. from_frequencies
+    builds the classic sum of letter frequencies.
+    """
+
+    def __init__(self, table):
+        super().__init__(table)
+
+        #_rows[byte][key] == table[byte ^ key]. Built on first use by
+        #histogram_key_scores
+        self._rows = None
+
+    def score(self, bytestring):
+        return sum(map(self.table.__getitem__, bytestring))
+
+    def key_scores(self, bytestring):
+        import collections
+
+        #The score only depends on how often each byte occurs, so the bytes
+        #are counted once
+        return self.histogram_key_scores(collections.Counter(bytestring))
+
+    def histogram_key_scores(self, histogram):
+        #Each distinct byte adds its row of the key/byte score table
+        if self._rows is None:
+            self._rows = [[self.table[byte ^ key] for key in range(0, 256)] for byte in range(0, 256)]
+
+        scores = [0]*256
+        for byte, count in histogram.items():
+            row = self._rows[byte]
+            scores = [score + count*byte_score for score, byte_score in zip(scores, row)]
+
+        return scores
+
+    @classmethod
+    def from_frequencies(cls, frequencies):
+        """Builds a model which scores a byte by its frequency in frequencies,
+        a dict of lower case character -> frequency such as EnglishFreq"""
+        return cls([frequencies.get(chr(byte).lower(), 0) for byte in range(0, 256)])
+
+    @classmethod
+    def train(cls, corpus):
+        probabilities = _byte_probabilities(corpus)
+        table = [math.log(probabilities[_FOLD[byte]]) for byte in range(0, 256)]
+
+        return cls(table)
+
+
+class ChiSquaredModel(ScoringModel):
+    """Scores a bytes object by how well its (case folded) byte histogram
+    fits the expected distribution using Pearson's chi-squared statistic.
+    table[byte] is the expected probability of byte, and 0 for upper case
+    letters whose counts are added to the lower case letters. The score is
+    -chi_squared so that higher is better.
+    """
+
+    def __init__(self, table):
+        super().__init__(table)
+        self._inverse = [1/probability if probability else 0 for probability in self.table]
+
+    def _chi_squared(self, histogram, length):
+        #sum (O - E)**2/E == sum O**2/E - length, as the expected counts E sum
+        #to length
+        inverse = self._inverse
+        return sum(count*count*inverse[byte] for byte, count in histogram.items())/length - length
+
+    def score(self, bytestring):
+        import collections
+
+        if not bytestring:
+            return 0
+
+        return -self._chi_squared(collections.Counter(bytestring.translate(_FOLD)), len(bytestring))
+
+    def key_scores(self, bytestring):
+        import collections
+
+        #Count the bytes once instead of decrypting
+        return self.histogram_key_scores(collections.Counter(bytestring))
+
+    def histogram_key_scores(self, histogram):
+        import collections
+
+        length = sum(histogram.values())
+        if not length:
+            return [0]*256
+
+        #Fold the histogram under each key
+        histogram = histogram.items()
+        scores = []
+        for key in range(0, 256):
+            folded = collections.defaultdict(int)
+            for byte, count in histogram:
+                folded[_FOLD[byte ^ key]] += count
+            scores.append(-self._chi_squared(folded, length))
+
+        return scores
+
+    @classmethod
+    def from_frequencies(cls, frequencies):
+        """Builds a model whose expected distribution is frequencies, a dict of
+        lower case character -> frequency such as EnglishFreq. Other bytes get
+        a small probability so that they are penalised rather than ignored."""
+        probabilities = [frequencies.get(chr(byte), 0) for byte in range(0, 256)]
+        floor = min(probabilities[byte] for byte in range(0, 256) if probabilities[byte])/100
+        probabilities = [probability or floor for probability in probabilities]
+
+        #Upper case letters are counted as lower case
+        for byte in b'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+            probabilities[byte] = 0
+
+        total = sum(probabilities)
+
+        return cls([probability/total for probability in probabilities])
+
+    @classmethod
+    def train(cls, corpus):
+        probabilities = _byte_probabilities(corpus)
+        for byte in b'ABCDEFGHIJKLMNOPQRSTUVWXYZ':
+            probabilities[byte] = 0
+
+        total = sum(probabilities)
+
+        return cls([probability/total for probability in probabilities])
+
+
+class BigramModel(ScoringModel):
+    """Scores each pair of adjacent bytes: the score of a bytes object is the
+    sum of table[256*first + second] over its adjacent pairs, where the table
+    holds the log probability of the (case folded) pair. This captures which
+    letters follow each other, so it separates English from text with the
+    right letter frequencies in the wrong order.
+    """
+
+    table_size = 256*256
+
+    def score(self, bytestring):
+        table = self.table
+        return sum(table[first << 8 | second] for first, second in zip(bytestring, bytestring[1:]))
+
+    def key_scores(self, bytestring):
+        import collections
+
+        #Count each pair once. Decrypting both bytes of a pair with key is the
+        #same as XORing its table index with 257*key
+        pairs = collections.Counter(first << 8 | second for first, second in zip(bytestring, bytestring[1:])).items()
+        table = self.table
+
+        return [sum(count*table[pair ^ mask] for pair, count in pairs) for mask in range(0, 256*257, 257)]
+
+    @classmethod
+    def train(cls, corpus):
+        import collections
+
+        corpus = corpus.translate(_FOLD)
+        counts = collections.Counter(first << 8 | second for first, second in zip(corpus, corpus[1:]))
+        total = max(len(corpus) - 1, 0) + cls.table_size*SMOOTHING
+
+        #Look up every pair through its case folded pair
+        fold = _FOLD
+        table = [math.log((counts[fold[pair >> 8] << 8 | fold[pair & 0xff]] + SMOOTHING)/total)
+                 for pair in range(0, cls.table_size)]
+
+        return cls(table)
+
+
+#The default model, the sum of English letter frequencies
+ENGLISH_FREQUENCY = UnigramModel.from_frequencies(EnglishFreq)
+
+MODELS = {'unigram': UnigramModel, 'chi_squared': ChiSquaredModel, 'bigram': BigramModel}
+
+def load_model(name, corpus = 'words_alpha.txt'):
+    """Returns a scoring model by name, trained on corpus (and cached).
+
+    Args:
+        name (str): one of 'frequency' (ENGLISH_FREQUENCY, needs no corpus),
+            'unigram', 'chi_squared' or 'bigram'
+        corpus (str) = 'words_alpha.txt': path to the training corpus
+
+    returns:
+        ScoringModel
+
+    raises:
+        Exception('Unknown model') if name is not one of the above
+    """
+    if name == 'frequency':
+        return ENGLISH_FREQUENCY
+    if name not in MODELS:
+        raise Exception('Unknown model: ' + str(name))
+
+    return MODELS[name].from_corpus(corpus)
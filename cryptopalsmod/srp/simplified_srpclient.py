@@ -1,4 +1,4 @@
-from cryptopalsmod.number_theory import NIST_PRIME, modexp
+from cryptopalsmod.number_theory import NIST_PRIME, fixed_base, modexp
 import secrets
 from cryptopalsmod.hmac import hmac
 from hashlib import sha256
@@ -61,7 +61,7 @@ class SimplifiedSRPClient():
         Returns:
             bytes, int: a tuple of user email (bytes) and the clients secret key (int)
         """
-        self.public_key = modexp(self.base, self.secret_key, self.prime)
+        self.public_key = fixed_base(self.base, self.prime).pow_fixed(self.secret_key)
         return self.user_email, self.public_key
 
     def recv_dh_public_key(self, salt, server_public_key, u):
@@ -92,8 +92,7 @@ class SimplifiedSRPClient():
         #convert salt to bytes for hashing
         salt_bytes = bso.int_to_bytes(self.salt)
         
-        password_exp = sha256(salt_bytes + self.user_password).hexdigest()
-        password_exp = int(password_exp, 16)
+        password_exp = bso.bytes_to_int(sha256(salt_bytes + self.user_password).digest())
         
         
         #Calculating the key for hmac
@@ -118,7 +117,7 @@ class SimplifiedSRPClient_HTTP(SimplifiedSRPClient):
             string, int: a tuple of user email and the clients secret key (int)
         """
         
-        self.public_key = modexp(self.base, self.secret_key, self.prime)
+        self.public_key = fixed_base(self.base, self.prime).pow_fixed(self.secret_key)
         
         return self.user_email.decode(), self.public_key
 
@@ -1,4 +1,4 @@
-from cryptopalsmod.number_theory import NIST_PRIME, modexp
+from cryptopalsmod.number_theory import NIST_PRIME, fixed_base, modexp
 import secrets
 from cryptopalsmod.hmac import hmac
 from hashlib import sha256
@@ -64,10 +64,9 @@ class SimplifiedSRPServer():
         #password is padded with salt (a random int) and hased to be used as
         #an exponent. This same calculation is also done by the client.
 
-        password_exponent = sha256(salt_bytes + user_password).hexdigest()
-        password_exponent = int(password_exponent, 16)
+        password_exponent = bso.bytes_to_int(sha256(salt_bytes + user_password).digest())
 
-        return modexp(self.base, password_exponent, self.prime)
+        return fixed_base(self.base, self.prime).pow_fixed(password_exponent)
        
     def send_dh_public_key(self):
         """Calculates and returns the SRP public key
@@ -79,7 +78,7 @@ class SimplifiedSRPServer():
         """
 
         #key calculaton
-        self.public_key = modexp(self.base, self.secret_key, self.prime)
+        self.public_key = fixed_base(self.base, self.prime).pow_fixed(self.secret_key)
         self.u = secrets.randbelow(2**129)
 
         return self.salt, self.public_key, self.u
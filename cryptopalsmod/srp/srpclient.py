@@ -1,4 +1,4 @@
-from cryptopalsmod.number_theory import NIST_PRIME, modexp
+from cryptopalsmod.number_theory import NIST_PRIME, fixed_base, modexp
 import secrets
 from cryptopalsmod.hmac import hmac
 from hashlib import sha256
@@ -64,7 +64,7 @@ class SRPClient():
         Returns:
             bytes, int: a tuple of user email (bytes) and the clients secret key (int)
         """
-        self.public_key = modexp(self.base, self.secret_key, self.prime)
+        self.public_key = fixed_base(self.base, self.prime).pow_fixed(self.secret_key)
         return self.user_email, self.public_key
 
     def recv_dh_public_key(self, salt, server_public_key):
@@ -88,18 +88,16 @@ class SRPClient():
             bytes: hmac depending on password, salt and server and client keys
         
         """
-        u = sha256(bso.int_to_bytes(self.public_key) + bso.int_to_bytes(self.server_public_key)).hexdigest()
-        u = int(u, 16)
+        u = bso.bytes_to_int(sha256(bso.int_to_bytes(self.public_key) + bso.int_to_bytes(self.server_public_key)).digest())
 
         #conver salt to bytes for hashing
         salt_bytes = bso.int_to_bytes(self.salt)
         
-        password_exp = sha256(salt_bytes + self.user_password).hexdigest()
-        password_exp = int(password_exp, 16)
+        password_exp = bso.bytes_to_int(sha256(salt_bytes + self.user_password).digest())
         
         
         #Calculating the key for hmac
-        S_base = (self.server_public_key - self.k * modexp(self.base, password_exp, self.prime)) % self.prime
+        S_base = (self.server_public_key - self.k * fixed_base(self.base, self.prime).pow_fixed(password_exp)) % self.prime
         S_exponent = (self.secret_key + u * password_exp) % self.prime
         S = modexp(S_base, S_exponent, self.prime)
         
@@ -121,7 +119,7 @@ class SRPClient_HTTP(SRPClient):
             string, int: a tuple of user email and the clients secret key (int)
         """
         
-        self.public_key = modexp(self.base, self.secret_key, self.prime)
+        self.public_key = fixed_base(self.base, self.prime).pow_fixed(self.secret_key)
         
         return self.user_email.decode(), self.public_key
 
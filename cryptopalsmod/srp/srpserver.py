@@ -1,4 +1,4 @@
-from cryptopalsmod.number_theory import NIST_PRIME, modexp
+from cryptopalsmod.number_theory import NIST_PRIME, fixed_base, modexp
 import secrets
 from cryptopalsmod.hmac import hmac
 from hashlib import sha256
@@ -67,10 +67,9 @@ class SRPServer():
         #password is padded with salt (a random int) and hased to be used as
         #an exponent. This same calculation is also done by the client.
 
-        password_exponent = sha256(salt_bytes + user_password).hexdigest()
-        password_exponent = int(password_exponent, 16)
+        password_exponent = bso.bytes_to_int(sha256(salt_bytes + user_password).digest())
 
-        return modexp(self.base, password_exponent, self.prime)
+        return fixed_base(self.base, self.prime).pow_fixed(password_exponent)
        
     def send_dh_public_key(self):
         """Calculates and returns the SRP public key
@@ -81,7 +80,7 @@ class SRPServer():
         """
 
         #key calculaton
-        self.public_key = (self.k *self.v + modexp(self.base, self.secret_key, self.prime)) % self.prime
+        self.public_key = (self.k *self.v + fixed_base(self.base, self.prime).pow_fixed(self.secret_key)) % self.prime
         
         return self.salt, self.public_key
 
@@ -117,8 +116,7 @@ class SRPServer():
                         'Nope', 400 if the verification is unsuccessful
         """
  
-        u = sha256(bso.int_to_bytes(self.client_public_key) + bso.int_to_bytes(self.public_key)).hexdigest()
-        u = int(u, 16)
+        u = bso.bytes_to_int(sha256(bso.int_to_bytes(self.client_public_key) + bso.int_to_bytes(self.public_key)).digest())
 
         S = modexp(self.client_public_key*modexp(self.v, u, self.prime), self.secret_key, self.prime)
         
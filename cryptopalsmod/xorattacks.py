@@ -2,15 +2,15 @@
 solving cryptopals challenges"""
 
 import cryptopalsmod.bytestringops as bso
+import cryptopalsmod.fileops as fileops
+import cryptopalsmod.scoring as scoring
+import heapq
 import itertools
+import os
 import random
 
-EnglishFreq = {'a': 0.0651738, 'b': 0.0124248, 'c': 0.0217339, 'd': 0.0349835, 'e': 0.1041442, 'f': 0.0197881, 'g': 0.0158610,
-    'h': 0.0492888, 'i': 0.0558094, 'j': 0.0009033, 'k': 0.0050529, 'l': 0.0331490, 'm': 0.0202124, 'n': 0.0564513,
-    'o': 0.0596302, 'p': 0.0137645, 'q': 0.0008606, 'r': 0.0497563, 's': 0.0515760, 't': 0.0729357, 'u': 0.0225134,
-    'v': 0.0082903, 'w': 0.0171272, 'x': 0.0013692, 'y': 0.0145984, 'z': 0.0007836, ' ': 0.1918182}
-#Frequencies of characters (lower case) in the english language
-
+#EnglishFreq used to live here, keep it importable from xorattacks
+from cryptopalsmod.scoring import EnglishFreq
 
 def EnglishScore(bytestring, normalise = False):
     """ Assigns a score to a bytes object which is higher if the characters
@@ -26,59 +26,213 @@ def EnglishScore(bytestring, normalise = False):
         form EnglishFreq.
     """
 
-    score = 0
-    for byte in bytestring:
+    score = scoring.ENGLISH_FREQUENCY.score(bytestring)
 
-        #EnglishFreq only contains lower case keys
-        character = chr(byte).lower()
-        score += EnglishFreq.get(character, 0)
-    
     if normalise:
         score = score/len(bytestring)
 
     return score
 
-def xor_singlebyte_key_attack(bytestring):
+def singlebyte_key_scores(bytestring, model = None):
+    """Computes the score of the decryption of bytestring under every
+    single byte XOR key. Models score from byte (or pair) counts, so nothing
+    is actually decrypted.
+
+    Args:
+        bytestring (bytes): the bytes object to be scored
+        model = None (scoring.ScoringModel): the model used to score. If None,
+            uses scoring.ENGLISH_FREQUENCY, the same score as EnglishScore
+
+    returns:
+        list<float>: scores[key] == model.score(bso.repeatedXOR(bytestring, bytes([key])))
+    """
+    if model is None:
+        model = scoring.ENGLISH_FREQUENCY
+
+    return model.key_scores(bytestring)
+
+def xor_singlebyte_key_attack(bytestring, k = 256, min_score = None, model = None):
     """Attemts to decrypt an English plaintext which has been encrypted using
-    a single byte XOR to produce bytestring. This attack iterates through all 
-    possible 256 single byte keys and assigns a score via EnglishScore. Yields 
-    a dictionary with dictionary keys 'key' and 'decryption' in order
-    of likeliness
+    a single byte XOR to produce bytestring. This attack scores all possible
+    256 single byte keys via singlebyte_key_scores. Yields a dictionary with
+    dictionary keys 'key' and 'decryption' in order of likeliness. Only the
+    best k keys are ranked (using a heap) and only the keys which are yielded
+    are used to decrypt.
     
     Args:
         bytestring (bytes): the bytes object to be decrypted
+        k = 256 (int): the maximum number of keys to yield
+        min_score = None (float): if set, keys whose score is below min_score
+            are not yielded
+        model = None (scoring.ScoringModel): the model used to score keys, see
+            singlebyte_key_scores
 
     Yields:
         dict: a dict of ('key':(bytes) most likely key,'score':(float) a score assigned
-        to the decryption based on english chareter frequency, 
+        to the decryption by model, 
         'decryption':(bytes)decryption from key)
     """
 
-    results = []
+    scores = singlebyte_key_scores(bytestring, model)
 
-    for key in range(0,256):
-        scoreDict = {}
-        
-        key = bytes([key])
-        scoreDict['key'] = key
-        
-        decryption = bso.repeatedXOR(bytestring, key)
-        scoreDict['score'] = EnglishScore(decryption)
-        scoreDict['decryption'] = decryption
+    keys = range(0, 256)
+    if min_score is not None:
+        keys = [key for key in keys if scores[key] >= min_score]
 
-        
-        results.append(scoreDict)
-    
-    #sort results based on score
-    results = sorted(results, key=lambda val: val['score'], reverse=True)
+    #rank the best k keys based on score
+    keys = heapq.nlargest(k, keys, key=scores.__getitem__)
+
+    for key in keys:
+        key_bytes = bytes([key])
+        yield {'key':key_bytes,
+               'score':scores[key],
+               'decryption':bso.repeatedXOR(bytestring, key_bytes)}
+
+def _best_singlebyte_keys(batch):
+    """Finds the best single byte XOR key for each record in a batch and
+    returns the top_k records of the batch. Module level so that it can be
+    sent to worker processes by detect_single_byte_xor.
+
+    Args:
+        batch (tuple): (index of the first record (int), records (list<bytes>),
+            top_k (int), model (scoring.ScoringModel))
+
+    returns:
+        list<tuple>: (score, -index, key, record) for the best top_k records
+    """
+    start, records, top_k, model = batch
+
+    heap = []
+    for index, record in enumerate(records, start):
+        scores = singlebyte_key_scores(record, model)
+        key = max(range(0, 256), key=scores.__getitem__)
+        entry = (scores[key], -index, key, record)
+
+        if len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heappushpop(heap, entry)
+
+    return heap
 
-    for result in results:
-        yield result
+def detect_single_byte_xor(stream, top_k = 1, processes = None, batch_size = 1024, model = None):
+    """Finds the records in a stream which are most likely to be English
+    encrypted with a single byte XOR, eg the lines of 4.txt. Records are
+    scored in batches spread over a pool of processes. Only a bounded number
+    of batches are in flight and only the best top_k records are kept, so
+    memory use does not grow with the length of the stream.
 
-def estimate_keylength(ciphertext, max_key_length = 40, num_of_pairs = -1):
+    Args:
+        stream (iterable<bytes>): records to test, eg fileops.iter_records
+        top_k = 1 (int): number of results to return
+        processes = None (int): number of worker processes. If None, uses the
+            number of CPUs. If 1, runs in this process.
+        batch_size = 1024 (int): number of records sent to a worker at a time
+        model = None (scoring.ScoringModel): the model used to score records,
+            see singlebyte_key_scores
+
+    returns:
+        list<dict>: the top_k results, most likely first, as dicts of
+        ('index':(int) position of the record in stream, 'key':(bytes) key,
+        'score':(float) score of the decryption, 'decryption':(bytes))
+    """
+    import concurrent.futures
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    records = iter(stream)
+    batches = ((start, list(itertools.islice(records, batch_size)), top_k, model)
+               for start in itertools.count(0, batch_size))
+    batches = itertools.takewhile(lambda batch: batch[1], batches)
+
+    heap = []
+    def merge(entries):
+        for entry in entries:
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heappushpop(heap, entry)
+
+    if processes == 1:
+        for batch in batches:
+            merge(_best_singlebyte_keys(batch))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            pending = set()
+            for batch in batches:
+                pending.add(executor.submit(_best_singlebyte_keys, batch))
+
+                #Keep a bounded number of batches in flight and merge results
+                #as they arrive
+                if len(pending) >= 2*processes:
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        merge(future.result())
+
+            for future in concurrent.futures.as_completed(pending):
+                merge(future.result())
+
+    results = []
+    for score, index, key, record in sorted(heap, reverse=True):
+        key = bytes([key])
+        results.append({'index':-index,
+                        'key':key,
+                        'score':score,
+                        'decryption':bso.repeatedXOR(record, key)})
+
+    return results
+
+#estimate_keylength compares every pair of blocks when there are at most this
+#many pairs, and a sample of this many pairs otherwise
+KEYLENGTH_MAX_PAIRS = 4096
+
+def _keylength_distance(ciphertext, key_length, num_of_pairs, rng):
+    """Returns the mean Hamming distance per byte between pairs of full blocks
+    of length key_length in ciphertext, or inf if there are fewer than two
+    full blocks. See estimate_keylength."""
+    num_blocks = len(ciphertext)//key_length
+    all_pairs = num_blocks*(num_blocks - 1)//2
+
+    if num_of_pairs <= -1:
+        num_of_pairs = KEYLENGTH_MAX_PAIRS if all_pairs > KEYLENGTH_MAX_PAIRS else -1
+
+    if all_pairs == 0 or num_of_pairs == 0:
+        return float('inf')
+
+    if num_of_pairs == -1:
+        #Few enough blocks to compare them all
+        blocks = [ciphertext[i: i+key_length] for i in range(0, num_blocks*key_length, key_length)]
+        matrix = bso.pairwise_hamming(blocks)
+        total = sum(sum(row) for row in matrix)//2
+
+        return total/(all_pairs*key_length)
+
+    #Draw pairs of distinct block indices one at a time so the pairs are never
+    #all built, and convert only the sampled blocks to integers
+    view = memoryview(ciphertext)
+    total = 0
+    for _ in range(0, num_of_pairs):
+        i = rng.randrange(num_blocks)
+        j = rng.randrange(num_blocks - 1)
+        if j >= i:
+            j += 1
+
+        block1 = int.from_bytes(view[i*key_length: (i+1)*key_length], 'big')
+        block2 = int.from_bytes(view[j*key_length: (j+1)*key_length], 'big')
+        total += bso._popcount(block1 ^ block2)
+
+    return total/(num_of_pairs*key_length)
+
+def estimate_keylength(ciphertext, max_key_length = 40, num_of_pairs = -1, k = None, seed = 0):
     """Estimates the key length in a repeated XOR ciphertext using the 
     hamming distance between blocks. Yields key lengths in order of likeliness.
 
+    Only full blocks are compared. When there are more than
+    KEYLENGTH_MAX_PAIRS pairs of blocks, a random sample of pairs is used so
+    the cost does not grow with the square of the ciphertext length. The
+    sample is seeded, so the estimate is the same on every run.
+
     Args:
         ciphertext (bytes): the ciphertext encrypted using a repeated xor for
         which we are estimating the key length
@@ -86,85 +240,416 @@ def estimate_keylength(ciphertext, max_key_length = 40, num_of_pairs = -1):
         max_key_length = 40 (int): the highest key length to test
         
         num_of_pairs = -1 (int): the number of pairs of blocks to calculate the
-        hamming distance on. If less than or equal to -1, al possible pairs are
-        used. This may be ineffiecent and unncessary for large  ciphertexts
-        
+        hamming distance on. If less than or equal to -1, all possible pairs
+        are used, or KEYLENGTH_MAX_PAIRS sampled pairs if there are more.
+        Pairs are sampled with replacement.
+
+        k = None (int): if set, only the k most likely key lengths are yielded
+
+        seed = 0 (int): seed for sampling pairs
+
     yields:
-        int: length of the key
+        int: length of the key. Key lengths with fewer than two full blocks
+        come last.
     """ 
 
+    rng = random.Random(seed)
+
     keys_and_distances = []
     for key_length in range(2, max_key_length + 1):
-        
-        #segment the ciphertext into blocks the size of the possible key_length
-        blocks = [ciphertext[i: i+key_length] for i in range(0, len(ciphertext), key_length)]
-
-        #Pair up blocks and then calculate distances. If num_of_pairs > 1, 
-        # use only a random selecion of pairs. 
-
-        pairs = list(itertools.combinations(blocks, 2))
-        
-        if num_of_pairs > -1:
-            pairs = random.choices(pairs, k=num_of_pairs)
-        
         #divide hamming distances by key_length since large blacks are likely
         #have larger hammin distances
-        distances = [bso.HammingDistance(pair[0], pair[1])/(key_length) for pair in pairs]
-        score = sum(distances)/len(distances)
-
+        score = _keylength_distance(ciphertext, key_length, num_of_pairs, rng)
         keys_and_distances.append({'key_length':key_length, 'score':score})
 
-    #Sort and convert keys into a list without the score
-    keys_and_distances = sorted(keys_and_distances, key=lambda val: val['score'])
+    #Sort and convert keys into a list without the score. A heap is used when
+    #only the best k are needed
+    if k is None:
+        keys_and_distances = sorted(keys_and_distances, key=lambda val: val['score'])
+    else:
+        keys_and_distances = heapq.nsmallest(k, keys_and_distances, key=lambda val: val['score'])
     key_lengths = [key_and_distance['key_length'] for key_and_distance in keys_and_distances]
 
     for key_length in key_lengths:
         yield key_length
 
-def repeatedXOR_attack_key(ciphertext, key_length):
+def coincidence_counts(ciphertext, max_shift):
+    """Counts the coincidences of ciphertext with itself shifted by every
+    amount up to max_shift, ie the number of positions i where
+    ciphertext[i] == ciphertext[i + shift]. Rather than an FFT, each shift is
+    one big integer shift and XOR, and coincidences are the zero bytes of the
+    result, so every shift is a linear pass in C.
+
+    Args:
+        ciphertext (bytes): the bytes object to compare with itself
+        max_shift (int): the largest shift
+
+    returns:
+        list<int>: counts[shift] for shift in 0..max_shift. counts[0] is
+        len(ciphertext)
+    """
+    length = len(ciphertext)
+    value = int.from_bytes(ciphertext, 'big')
+
+    counts = [length]
+    for shift in range(1, max_shift + 1):
+        if shift >= length:
+            counts.append(0)
+            continue
+
+        #Byte i of the XOR is ciphertext[i] ^ ciphertext[i - shift] for
+        #i >= shift. The first shift bytes are compared with nothing
+        difference = (value ^ (value >> 8*shift)).to_bytes(length, 'big')
+        counts.append(difference.count(0, shift))
+
+    return counts
+
+def estimate_keylength_coincidence(ciphertext, max_key_length = 40, k = None):
+    """Estimates the key length in a repeated XOR ciphertext using the index
+    of coincidence of the ciphertext with shifted copies of itself. Bytes a
+    whole number of keys apart are encrypted with the same key byte, so they
+    coincide as often as plaintext bytes do, while other shifts coincide about
+    as often as random bytes. A key length is scored by how much more its
+    multiples coincide than the multiples of each of its divisors which are
+    not multiples of it. Multiples of the key length then score about zero,
+    as the shifts they are compared with are the other multiples of the key
+    length, and a divisor of the key length scores lower as only some of its
+    multiples are multiples of the key length.
+
+    The cost is linear in len(ciphertext) per shift, with no sampling, so this
+    suits long keys (hundreds or thousands of bytes) where comparing blocks is
+    slow and noisy. It needs a few multiples of the key length to fit in the
+    ciphertext.
+
+    Args:
+        ciphertext (bytes): the ciphertext encrypted using a repeated xor
+        max_key_length = 40 (int): the highest key length to test
+        k = None (int): if set, only the k most likely key lengths are yielded
+
+    yields:
+        int: length of the key
+    """
+    counts = coincidence_counts(ciphertext, max_key_length)
+
+    #Fraction of the compared positions which coincide for each shift
+    rates = [0] + [counts[shift]/(len(ciphertext) - shift) if shift < len(ciphertext) else 0
+                   for shift in range(1, max_key_length + 1)]
+
+    #sums[d] and numbers[d] are the sum and number of the rates of the
+    #multiples of d. divisors[n] are the proper divisors of n
+    sums = [0]*(max_key_length + 1)
+    numbers = [0]*(max_key_length + 1)
+    divisors = [[] for _ in range(0, max_key_length + 1)]
+    for d in range(1, max_key_length + 1):
+        for multiple in range(d, max_key_length + 1, d):
+            sums[d] += rates[multiple]
+            numbers[d] += 1
+            if multiple != d:
+                divisors[multiple].append(d)
+
+    keys_and_scores = []
+    for key_length in range(2, max_key_length + 1):
+        #Compare the multiples of key_length with the shifts which are
+        #multiples of one of its divisors but not of key_length. A multiple
+        #of the key length has peaks at the odd multiples of the key length
+        #there, and a divisor of the key length has shifts which are not
+        #peaks amongst its own multiples, so neither scores as high as the key
+        #length itself
+        background = max((sums[d] - sums[key_length])/(numbers[d] - numbers[key_length])
+                         for d in divisors[key_length])
+        score = sums[key_length]/numbers[key_length] - background
+
+        keys_and_scores.append({'key_length':key_length, 'score':score})
+
+    if k is None:
+        keys_and_scores = sorted(keys_and_scores, key=lambda val: val['score'], reverse=True)
+    else:
+        keys_and_scores = heapq.nlargest(k, keys_and_scores, key=lambda val: val['score'])
+
+    for key_and_score in keys_and_scores:
+        yield key_and_score['key_length']
+
+#Key length estimators which can be used by repeatedXOR_attack
+KEYLENGTH_ESTIMATORS = {'hamming': estimate_keylength,
+                        'coincidence': estimate_keylength_coincidence}
+
+def repeatedXOR_attack_key(ciphertext, key_length, model = None):
     """Takes a ciphertext encrypted using a repeated XOR and a keylength and
     attempts and computes the most likely key using xor_singlebyte_key_attack
     
     Args:
         ciphertext (bytes): ciphertext encrypted using a repeated XOR
         key_length (int): key length to use for decryption
+        model = None (scoring.ScoringModel): the model used to score keys, see
+            singlebyte_key_scores
 
     returns:
         bytes: most likely key of length key_length
     """
 
-    #split the ciphertext into bytes which, if the key_length is correct, have
-    #been ecrypted using the same same byte
-    transpose = bso.transpose_by_blocklength(ciphertext, key_length)
+    #split the ciphertext into columns which, if the key_length is correct,
+    #have been ecrypted using the same same byte
+    return key_from_columns(bso.BlockMatrix(ciphertext, key_length), model)
 
-    key = b''
-    for row in transpose:
-        key += next(xor_singlebyte_key_attack(row))['key']
-    
-    return key
+def key_from_columns(matrix, model = None):
+    """Takes a bso.BlockMatrix whose columns have each been encrypted with a
+    single byte XOR and computes the most likely key using 
+    xor_singlebyte_key_attack on each column
+
+    Args:
+        matrix (bso.BlockMatrix): matrix of ciphertext, eg rows of blocks of a
+            repeated XOR or a list of ciphertexts sharing a keystream
+        model = None (scoring.ScoringModel): the model used to score keys, see
+            singlebyte_key_scores
 
-def repeatedXOR_attack(ciphertext, max_key_length = 40):
+    returns:
+        bytes: most likely key of length matrix.num_columns
+    """
+    key = [next(xor_singlebyte_key_attack(column, k=1, model=model))['key'] for column in matrix.columns()]
+
+    return b''.join(key)
+
+def repeatedXOR_attack(ciphertext, max_key_length = 40, k = None, min_score = None, model = None,
+                       estimator = 'hamming'):
     """Takes a ciphertext encrypted using a repeated XOR and
     attempts to decrypt by estimating the key length using estimate_keylength
-    and using this estimate to decrypt using repeatedXOR_attack_key. 
+    (or another estimator) and using this estimate to decrypt using repeatedXOR_attack_key. 
     yields a dictionary with the key and decryption in order of likliness of 
-    key length
+    key length. Each key length is only cracked and decrypted when the next
+    result is requested.
     
     Args:
         ciphertext (bytes): ciphertext encrypted using a repeated XOR
         max_key_length = 40 (int): the highest key length to test
+        k = None (int): if set, only the k most likely key lengths are tried
+        min_score = None (float): if set, decryptions whose normalised score
+            is below min_score are skipped
+        model = None (scoring.ScoringModel): the model used to score keys and
+            decryptions. If None, uses scoring.ENGLISH_FREQUENCY
+        estimator = 'hamming' (str): how key lengths are estimated, a key of
+            KEYLENGTH_ESTIMATORS. 'coincidence' is better for long keys
 
     Yields:
         dict: a dict of ('key':most likely key (bytes), 'decryption': decryption
-        based on the key (bytes))    
+        based on the key (bytes), 'score': score of the decryption under model
+        divided by its length (float))
     """
 
-    key_lengths = estimate_keylength(ciphertext, max_key_length)
+    if model is None:
+        model = scoring.ENGLISH_FREQUENCY
+
+    key_lengths = KEYLENGTH_ESTIMATORS[estimator](ciphertext, max_key_length, k=k)
 
     for key_length in key_lengths:
-        key = repeatedXOR_attack_key(ciphertext, key_length)
+        key = repeatedXOR_attack_key(ciphertext, key_length, model)
         decryption = bso.repeatedXOR(ciphertext, key)
-        yield {'key':key, 'decryption':decryption}
+        score = model.score(decryption)/len(decryption)
+
+        if min_score is not None and score < min_score:
+            continue
+
+        yield {'key':key, 'decryption':decryption, 'score':score}
 
+#State of a worker process of repeatedXOR_attack_parallel, set once per worker
+#by _init_column_worker so the ciphertext is not sent with every task
+_column_worker_state = {}
+
+def _init_column_worker(ciphertext, model):
+    _column_worker_state['ciphertext'] = ciphertext
+    _column_worker_state['model'] = model
+
+def _column_keys(task):
+    """Cracks a range of columns of the ciphertext for one key length. Module
+    level so that it can be sent to worker processes by
+    repeatedXOR_attack_parallel.
+
+    Args:
+        task (tuple): (key_length (int), first column (int), end column (int))
+
+    returns:
+        tuple: (key_length, first column, key bytes of the columns (bytes))
+    """
+    key_length, start, stop = task
+    matrix = bso.BlockMatrix(_column_worker_state['ciphertext'], key_length)
+    model = _column_worker_state['model']
+
+    key = [next(xor_singlebyte_key_attack(matrix.column(index), k=1, model=model))['key']
+           for index in range(start, stop)]
+
+    return key_length, start, b''.join(key)
+
+def repeatedXOR_attack_parallel(ciphertext, max_key_length = 40, k = None, threshold = None,
+                                model = None, estimator = 'hamming', processes = None):
+    """Like repeatedXOR_attack, but the columns of every candidate key length
+    are cracked at the same time over a pool of processes. Work is submitted
+    in order of likeliness of key length. As soon as a decryption's score
+    reaches threshold, the remaining work is cancelled and that decryption is
+    returned.
+
+    Args:
+        ciphertext (bytes): ciphertext encrypted using a repeated XOR
+        max_key_length = 40 (int): the highest key length to test
+        k = None (int): if set, only the k most likely key lengths are tried
+        threshold = None (float): score (see repeatedXOR_attack) at which a
+            decryption is accepted. If None, every key length is tried and
+            the best decryption is returned
+        model = None (scoring.ScoringModel): the model used to score keys and
+            decryptions. If None, uses scoring.ENGLISH_FREQUENCY
+        estimator = 'hamming' (str): how key lengths are estimated, a key of
+            KEYLENGTH_ESTIMATORS
+        processes = None (int): number of worker processes. If None, uses the
+            number of CPUs. If 1, runs in this process.
 
-    
\ No newline at end of file
+    returns:
+        dict: ('key':(bytes), 'decryption':(bytes), 'score':(float)) for the
+        first decryption to reach threshold, or else the best scoring one.
+        None if there are no key lengths to try, eg max_key_length < 2
+    """
+    import concurrent.futures
+
+    if model is None:
+        model = scoring.ENGLISH_FREQUENCY
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    ciphertext = bytes(ciphertext)
+    key_lengths = list(KEYLENGTH_ESTIMATORS[estimator](ciphertext, max_key_length, k=k))
+
+    #Split each key length into about one range of columns per process
+    tasks = []
+    for key_length in key_lengths:
+        step = -(-key_length//processes)
+        tasks.extend((key_length, start, min(start + step, key_length))
+                     for start in range(0, key_length, step))
+
+    #parts[key_length][first column] = key bytes of a range of columns
+    parts = {key_length: {} for key_length in key_lengths}
+    results = []
+
+    def merge(key_length, start, key_part):
+        """Stores a range of key bytes, scores the decryption once the key
+        is complete and returns True if it reaches threshold"""
+        parts[key_length][start] = key_part
+        if sum(map(len, parts[key_length].values())) < key_length:
+            return False
+
+        key = b''.join(part for _, part in sorted(parts[key_length].items()))
+        decryption = bso.repeatedXOR(ciphertext, key)
+        results.append({'key':key,
+                        'decryption':decryption,
+                        'score':model.score(decryption)/len(decryption)})
+
+        return threshold is not None and results[-1]['score'] >= threshold
+
+    if processes == 1:
+        _init_column_worker(ciphertext, model)
+        try:
+            for task in tasks:
+                if merge(*_column_keys(task)):
+                    return results[-1]
+        finally:
+            _column_worker_state.clear()
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(processes, initializer=_init_column_worker,
+                                                          initargs=(ciphertext, model))
+        futures = []
+        try:
+            futures = [executor.submit(_column_keys, task) for task in tasks]
+
+            for future in concurrent.futures.as_completed(futures):
+                if merge(*future.result()):
+                    return results[-1]
+        finally:
+            #Cancel the tasks which have not started and don't wait for the
+            #ones already running, which leaving a with block would do
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    if not results:
+        return None
+
+    return max(results, key=lambda result: result['score'])
+
+def key_from_histograms(histograms, model = None):
+    """Computes the most likely key of a repeated XOR from the number of times
+    each byte occurs at each position of the key
+
+    Args:
+        histograms (list<dict>): histograms[i] maps byte value -> count for
+            the bytes encrypted with byte i of the key
+        model = None (scoring.ScoringModel): the model used to score keys. If
+            None, uses scoring.ENGLISH_FREQUENCY. Must support
+            histogram_key_scores
+
+    returns:
+        bytes: most likely key of length len(histograms)
+    """
+    if model is None:
+        model = scoring.ENGLISH_FREQUENCY
+
+    key = bytearray()
+    for histogram in histograms:
+        scores = model.histogram_key_scores(histogram)
+        key.append(max(range(0, 256), key=scores.__getitem__))
+
+    return bytes(key)
+
+def repeatedXOR_attack_file(filename, key_length, output_filename = None, model = None,
+                            chunk_size = fileops.CHUNK_SIZE):
+    """Cracks a repeated XOR ciphertext stored in a file, for files too large
+    to load. The file is memory mapped and read once, sequentially, counting
+    the bytes at each position of the key. The key is computed from the
+    counts, and if output_filename is set, the file is then decrypted into
+    output_filename chunk by chunk.
+
+    Args:
+        filename (str): path to the raw (not encoded) ciphertext
+        key_length (int): length of the key
+        output_filename = None (str): file to write the decryption to
+        model = None (scoring.ScoringModel): see key_from_histograms
+        chunk_size = fileops.CHUNK_SIZE (int): number of bytes processed at
+            a time, rounded down to a multiple of key_length
+
+    returns:
+        bytes: most likely key of length key_length
+    """
+    import collections
+    import mmap
+
+    assert key_length > 0
+
+    #Whole keys per chunk so every chunk starts at the start of the key
+    step = max(chunk_size - chunk_size % key_length, key_length)
+    histograms = [collections.Counter() for _ in range(0, key_length)]
+
+    with open(filename, 'rb') as file:
+        #An empty file can not be memory mapped
+        if os.fstat(file.fileno()).st_size == 0:
+            ciphertext = b''
+        else:
+            ciphertext = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if hasattr(ciphertext, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                ciphertext.madvise(mmap.MADV_SEQUENTIAL)
+
+            for start in range(0, len(ciphertext), step):
+                chunk = ciphertext[start: start + step]
+                for position, histogram in enumerate(histograms):
+                    histogram.update(chunk[position::key_length])
+
+            key = key_from_histograms(histograms, model)
+
+            if output_filename is not None:
+                with open(output_filename, 'wb') as output:
+                    for start in range(0, len(ciphertext), step):
+                        chunk = ciphertext[start: start + step]
+                        #repeatedXOR repeats the shorter input, so trim the key
+                        #for a final chunk shorter than it
+                        output.write(bso.repeatedXOR(chunk, key[:len(chunk)]))
+        finally:
+            if isinstance(ciphertext, mmap.mmap):
+                ciphertext.close()
+
+    return key